@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+from config import ACTIVITY_HEATMAP_PATH
+from data_io import atomic_replace
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+HEATMAP_STATUSES = ['Approved', 'Declined']
+HEATMAP_CURRENCIES = ['IQD', 'USD', 'Other']
+HEATMAP_SHAPE = (len(WEEKDAYS), 24, len(HEATMAP_STATUSES), len(HEATMAP_CURRENCIES))
+
+# Function to count transactions into the weekday x hour x status x currency array
+def build_activity_counts(df):
+    df = df[df['date'].notna()]
+    weekday = df['date'].dt.weekday.to_numpy()
+    hour = df['date'].dt.hour.to_numpy()
+    declined = (df['transaction_status'] != 'Approved').to_numpy(dtype=int)
+    currency = pd.Categorical(df['currency'], categories=HEATMAP_CURRENCIES[:-1]).codes.astype(int)
+    currency[currency == -1] = len(HEATMAP_CURRENCIES) - 1
+    flat_index = np.ravel_multi_index((weekday, hour, declined, currency), HEATMAP_SHAPE)
+    return np.bincount(flat_index, minlength=int(np.prod(HEATMAP_SHAPE))).reshape(HEATMAP_SHAPE)
+
+# Function to load the stored activity counts (None if nothing was stored yet).
+# The store is kept up to date as an incremental store (see incremental_store.py).
+def load_activity_store(path=ACTIVITY_HEATMAP_PATH):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as store:
+        return {
+            'counts': store['counts'],
+            'key': str(store['key']),
+            'watermark': pd.Timestamp(store['watermark'][()]),
+            'folded': [str(file_hash) for file_hash in store['folded']],
+        }
+
+# Function to save the activity counts atomically
+def save_activity_store(store, path=ACTIVITY_HEATMAP_PATH):
+    with atomic_replace(path, suffix='.tmp.npz') as temp_path:
+        np.savez(
+            temp_path, counts=store['counts'], key=np.array(store['key']),
+            watermark=np.datetime64(store['watermark'], 'ns'), folded=np.array(store['folded'], dtype=str),
+        )
+
+# Function to build the activity store from the inception rows
+def build_activity_store(inception_df):
+    return {'counts': build_activity_counts(inception_df)}
+
+# Function to fold later transaction rows into the activity counts
+def fold_activity_rows(store, new_rows):
+    store['counts'] = store['counts'] + build_activity_counts(new_rows)
+
+# Function to display the hour-of-day x weekday heatmap by slicing the stored counts
+def display_activity_heatmap(counts):
+    st.write("### Activity by Hour and Weekday")
+    col1, col2 = st.columns(2)
+    with col1:
+        status = st.selectbox("Heatmap Status", options=['All'] + HEATMAP_STATUSES, index=0)
+    with col2:
+        currency = st.selectbox("Heatmap Currency", options=['All'] + HEATMAP_CURRENCIES, index=0)
+
+    selected = counts
+    selected = selected.sum(axis=2) if status == 'All' else selected[:, :, HEATMAP_STATUSES.index(status), :]
+    selected = selected.sum(axis=2) if currency == 'All' else selected[:, :, HEATMAP_CURRENCIES.index(currency)]
+
+    fig = go.Figure(data=[go.Heatmap(z=selected, x=list(range(24)), y=WEEKDAYS, colorscale='Viridis')])
+    fig.update_layout(title="Transactions by Hour of Day and Weekday", xaxis={'title': 'Hour', 'dtick': 1}, yaxis={'autorange': 'reversed'})
+    st.plotly_chart(fig, key="activity_heatmap_chart")
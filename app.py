@@ -1,6 +1,7 @@
 import streamlit as st
 from metrics_display import display_metrics
 from banking_metrics import display_transaction_metrics  # Import transaction metrics
+from dataset_manifest import refresh_manifest
 # Set page configuration
 st.set_page_config(page_title="Nasswallet Dashboard", layout="wide")
 # Inject JavaScript to force dark theme
@@ -18,6 +19,9 @@ st.markdown(dark_theme_js, unsafe_allow_html=True)
 # Set page configuration
 
 
+# Check the data files once per rerun; every section then reads the same manifest
+refresh_manifest()
+
 # Title of the application
 st.title("Nasswallet Dashboard")
 
@@ -0,0 +1,229 @@
+import io
+import os
+import pickle
+import hashlib
+import argparse
+from bisect import bisect_right, insort
+import numpy as np
+import pandas as pd
+import streamlit as st
+from config import (
+    APPROVAL_WINDOWS, APPROVAL_DROP_THRESHOLD, APPROVAL_MIN_TRANSACTIONS, APPROVAL_MONITOR_STATE_PATH,
+)
+from data_io import detect_compression, open_data_stream, atomic_replace
+
+# The monitor keeps per-minute approval buckets for each (network, transaction type) ordered by minute,
+# plus running totals per rolling window. Each window counts exactly the buckets later than its cutoff
+# (watermark - window): as the watermark (latest event time) moves, buckets that fall behind a cutoff
+# are subtracted, and late rows already behind a window's cutoff are never added to it. Each update
+# costs O(new rows) no matter how much history the source file holds.
+# The source file is read from the byte offset reached last time. A fingerprint of the bytes already
+# consumed detects a file that was replaced rather than appended to (e.g. the daily yesterday drop),
+# and the monitor then starts over on the new file.
+
+# Bytes fingerprinted at the start and at the end of the consumed part of the source file
+FINGERPRINT_BYTES = 4096
+
+# Function to create an empty monitor state for a source file
+def create_monitor_state(source_path, windows=APPROVAL_WINDOWS):
+    window_minutes = sorted(int(pd.Timedelta(window).total_seconds() // 60) for window in windows)
+    return {
+        'source_path': source_path,
+        'offset': 0,
+        'fingerprint': None,
+        'header': None,
+        'watermark': None,
+        'buckets': [],
+        'windows': {minutes: {'cutoff': None, 'totals': {}} for minutes in window_minutes},
+    }
+
+# Function to load the monitor state from disk, starting over if it tracks another file
+def load_monitor_state(source_path, state_path=APPROVAL_MONITOR_STATE_PATH):
+    if os.path.exists(state_path):
+        with open(state_path, 'rb') as f:
+            state = pickle.load(f)
+        if state['source_path'] == source_path:
+            return state
+    return create_monitor_state(source_path)
+
+# Function to save the monitor state to disk
+def save_monitor_state(state, state_path=APPROVAL_MONITOR_STATE_PATH):
+    with atomic_replace(state_path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(state, f)
+
+# Function to read a file's bytes from an offset, returning them with the file's full (decompressed) length
+def read_bytes_from(path, offset):
+    if detect_compression(path) is None:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return f.read(), os.path.getsize(path)
+    # Compressed files cannot be seeked; decompress and skip what was already read
+    with open_data_stream(path) as stream:
+        data = stream.read()
+    return data[offset:], len(data)
+
+# Function to fingerprint the bytes consumed from a file: the first and last few KB before the offset
+def consumed_fingerprint(path, offset):
+    if detect_compression(path) is None:
+        with open(path, 'rb') as f:
+            head = f.read(min(offset, FINGERPRINT_BYTES))
+            f.seek(max(0, offset - FINGERPRINT_BYTES))
+            tail = f.read(min(offset, FINGERPRINT_BYTES))
+    else:
+        with open_data_stream(path) as stream:
+            data = stream.read(offset)
+        head, tail = data[:FINGERPRINT_BYTES], data[max(0, len(data) - FINGERPRINT_BYTES):]
+    return hashlib.sha256(head + tail).hexdigest()
+
+# Function to read only the complete rows appended to the source file since the last run
+def read_new_rows(state):
+    path = state['source_path']
+    data, size = read_bytes_from(path, state['offset'])
+    if size < state['offset'] or (state['offset'] and consumed_fingerprint(path, state['offset']) != state['fingerprint']):
+        # The file was replaced rather than appended to; start over
+        state.update(create_monitor_state(path, [f"{minutes}min" for minutes in state['windows']]))
+        data, size = read_bytes_from(path, 0)
+
+    if state['header'] is None:
+        header_end = data.find(b'\n') + 1
+        if header_end == 0:
+            # Empty file, or the header is still being written; read it on the next run
+            return pd.DataFrame()
+        state['header'] = pd.read_csv(io.BytesIO(data[:header_end])).columns.tolist()
+        state['offset'] = header_end
+        data = data[header_end:]
+
+    # Leave a partially written last line for the next run
+    end = data.rfind(b'\n') + 1
+    state['offset'] += end
+    state['fingerprint'] = consumed_fingerprint(path, state['offset'])
+    if end == 0:
+        return pd.DataFrame(columns=state['header'])
+    return pd.read_csv(io.BytesIO(data[:end]), names=state['header'], header=None)
+
+# Function to add a bucket to the running totals of a window
+def add_to_window(window, key, approved, total, sign=1):
+    totals = window['totals'].setdefault(key, [0, 0])
+    totals[0] += sign * approved
+    totals[1] += sign * total
+
+# Function to get the minute of a bucket (the sort key of the bucket list)
+def bucket_minute(bucket):
+    return bucket[0]
+
+# Function to fold new transaction rows into the monitor
+def update_monitor(state, new_df):
+    if new_df.empty:
+        return state
+    dates = pd.to_datetime(new_df['date'], errors='coerce')
+    new_df = new_df.assign(
+        minute=dates.to_numpy().astype('datetime64[m]').astype(np.int64),
+        network=new_df['networkname'].fillna('Unknown'),
+        approved=(new_df['transaction_status'] == 'Approved').astype(int),
+    )[dates.notna().to_numpy()]
+    if new_df.empty:
+        return state
+
+    buckets = new_df.groupby(['minute', 'network', 'transaction_type']).agg(
+        approved=('approved', 'sum'), total=('approved', 'size')
+    ).reset_index()
+
+    watermark = int(buckets['minute'].max())
+    if state['watermark'] is not None:
+        watermark = max(watermark, state['watermark'])
+    state['watermark'] = watermark
+
+    # Move every window forward to the new watermark, subtracting the buckets it leaves behind
+    for minutes, window in state['windows'].items():
+        cutoff = watermark - minutes
+        start = 0 if window['cutoff'] is None else bisect_right(state['buckets'], window['cutoff'], key=bucket_minute)
+        end = bisect_right(state['buckets'], cutoff, key=bucket_minute)
+        for minute, key, approved, total in state['buckets'][start:end]:
+            add_to_window(window, key, approved, total, sign=-1)
+        window['cutoff'] = cutoff
+
+    # Add the new buckets in minute order, each only to the windows it falls inside
+    for minute, network, transaction_type, approved, total in buckets.itertuples(index=False):
+        key = (network, transaction_type)
+        insort(state['buckets'], (minute, key, approved, total), key=bucket_minute)
+        for window in state['windows'].values():
+            if minute > window['cutoff']:
+                add_to_window(window, key, approved, total)
+
+    # Drop buckets that every window has moved past
+    oldest_cutoff = min(window['cutoff'] for window in state['windows'].values())
+    del state['buckets'][:bisect_right(state['buckets'], oldest_cutoff, key=bucket_minute)]
+    return state
+
+# Function to read and fold in the rows appended to the source file since the last run
+def update_monitor_from_file(state):
+    return update_monitor(state, read_new_rows(state))
+
+# Function to get approval counts and rates per window, network and transaction type
+def get_window_stats(state):
+    rows = []
+    for minutes, window in state['windows'].items():
+        for (network, transaction_type), (approved, total) in window['totals'].items():
+            if total > 0:
+                rows.append({
+                    'window': str(pd.Timedelta(minutes=minutes)),
+                    'window_minutes': minutes,
+                    'networkname': network,
+                    'transaction_type': transaction_type,
+                    'approved': approved,
+                    'total': total,
+                    'approval_rate': round(approved / total * 100, 2),
+                })
+    return pd.DataFrame(rows, columns=['window', 'window_minutes', 'networkname', 'transaction_type', 'approved', 'total', 'approval_rate'])
+
+# Function to flag windows whose approval rate dropped below the baseline (longest window) by more than the threshold
+def check_alerts(state, threshold=APPROVAL_DROP_THRESHOLD, min_transactions=APPROVAL_MIN_TRANSACTIONS):
+    window_stats = get_window_stats(state)
+    if window_stats.empty:
+        return window_stats.assign(baseline_rate=[], drop=[])
+    baseline_minutes = max(state['windows'])
+    baseline = window_stats[window_stats['window_minutes'] == baseline_minutes]
+    baseline = baseline[['networkname', 'transaction_type', 'approval_rate']].rename(columns={'approval_rate': 'baseline_rate'})
+
+    alerts = window_stats[window_stats['window_minutes'] < baseline_minutes].merge(baseline, on=['networkname', 'transaction_type'])
+    alerts['drop'] = (alerts['baseline_rate'] - alerts['approval_rate']).round(2)
+    alerts = alerts[(alerts['drop'] > threshold) & (alerts['total'] >= min_transactions)]
+    return alerts.sort_values('drop', ascending=False, ignore_index=True)
+
+# Function to display approval-rate alerts and rolling window stats in the dashboard.
+# With update=False the saved state is shown as is (kept current by the precompute step or cron).
+def display_approval_alerts(source_path, state_path=APPROVAL_MONITOR_STATE_PATH, update=True):
+    state = load_monitor_state(source_path, state_path)
+    if update:
+        state = update_monitor_from_file(state)
+        save_monitor_state(state, state_path)
+
+    st.write("### Approval Rate Monitor")
+    if state['watermark'] is not None:
+        st.write(f"**Latest Transaction:** {pd.Timestamp(state['watermark'], unit='m')}")
+    alerts = check_alerts(state)
+    if alerts.empty:
+        st.success("No approval rate drops beyond the threshold.")
+    for alert in alerts.itertuples(index=False):
+        st.warning(
+            f"{alert.networkname} / {alert.transaction_type}: approval rate {alert.approval_rate}% over the last {alert.window} "
+            f"vs {alert.baseline_rate}% baseline ({alert.total} transactions)"
+        )
+    with st.expander("Rolling Window Approval Rates"):
+        st.dataframe(get_window_stats(state).drop(columns='window_minutes'))
+
+# Run the monitor once against a growing transaction file, e.g. every minute from cron
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update rolling-window approval rates and print alerts")
+    parser.add_argument('source', nargs='?', default='transaction_yesterday.csv')
+    parser.add_argument('--state', default=APPROVAL_MONITOR_STATE_PATH)
+    parser.add_argument('--threshold', type=float, default=APPROVAL_DROP_THRESHOLD)
+    parser.add_argument('--min-transactions', type=int, default=APPROVAL_MIN_TRANSACTIONS)
+    args = parser.parse_args()
+
+    monitor_state = update_monitor_from_file(load_monitor_state(args.source, args.state))
+    save_monitor_state(monitor_state, args.state)
+    print(get_window_stats(monitor_state).drop(columns='window_minutes').to_string(index=False))
+    for row in check_alerts(monitor_state, args.threshold, args.min_transactions).itertuples(index=False):
+        print(f"ALERT {row.networkname} / {row.transaction_type} [{row.window}]: {row.approval_rate}% vs baseline {row.baseline_rate}% (-{row.drop} pts, {row.total} txns)")
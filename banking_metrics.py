@@ -1,179 +1,441 @@
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
-from datetime import datetime
-
-# Function to get the creation date of a file
-def get_file_creation_date(file_path):
-    creation_time = os.path.getctime(file_path)  # Get the file creation time
-    return datetime.fromtimestamp(creation_time).strftime('%Y-%m-%d %H:%M:%S')
-
-# Function to load data from CSV files
-def load_data():
-    yesterday_path = 'transaction_yesterday.csv'
-    inception_path = 'transaction_inception.csv'
-    
-    yesterday_df = pd.read_csv(yesterday_path)
-    inception_df = pd.read_csv(inception_path)
-    inception_df['date'] = pd.to_datetime(inception_df['date'], errors='coerce')  # Convert to datetime
-    
-    # Get the creation date of each file
-    yesterday_date = get_file_creation_date(yesterday_path)
-    inception_date = get_file_creation_date(inception_path)
-    
-    return yesterday_df, inception_df, yesterday_date, inception_date
-
-# Function to calculate separated stats for IQD and USD
-def calculate_separated_stats(df):
-    df['amount'] = df.apply(lambda row: row.get('bill_amt') if pd.notnull(row.get('bill_amt')) else row.get('txn_amt'), axis=1)
-    df['currency'] = df.apply(lambda row: row.get('bill_curr') if pd.notnull(row.get('bill_curr')) else row.get('txn_curr'), axis=1)
-    df['currency'] = df['currency'].replace({368: 'IQD', 840: 'USD'})
-    
+from config import (
+    REPORTING_CURRENCY, FX_RATES_PATH, CURRENCY_CODES_PATH, CSV_ENGINE, RETRY_WINDOW, DATA_MODE, QUERY_ENGINE,
+    ACTIVITY_HEATMAP_PATH, DAILY_AGGREGATES_PATH, TRANSACTION_HISTORY_DIR,
+)
+from data_io import read_csv, TRANSACTION_COLUMN_TYPES
+from currency_codes import load_currency_codes, currency_labels
+from dataset_manifest import (
+    get_dataset_path, get_dataset_entry, get_file_creation_date, record_schema, cached_artifact, get_artifact_path, file_hash,
+    pipeline_key,
+)
+from activity_heatmap import load_activity_store, save_activity_store, build_activity_store, fold_activity_rows, display_activity_heatmap
+from incremental_store import update_incremental_store
+from daily_aggregates import (
+    load_daily_store, save_daily_store, build_daily_store, fold_daily_rows, calculate_period_deltas, calculate_stats_as_of,
+    select_comparison,
+)
+from partitioned_history import load_history_index, save_history_index, build_history, fold_history_rows, read_day_partition
+from approval_monitor import display_approval_alerts
+from tile_grid import tile_grid_styles, tile, render_tile_grid
+from metrics_display import display_status_counts_as_of
+from filter_bitmaps import FILTER_COLUMNS, build_filter_bitmaps, filter_values, filter_rows, bitmap_memory
+from country_metrics import (
+    DOMESTIC, CROSS_BORDER, build_country_index, lookup_country_rows, calculate_country_breakdown, display_country_breakdown,
+)
+from decline_metrics import build_decline_index, calculate_decline_view, display_decline_reason_metrics
+from duplicate_detection import mark_retries, unique_attempts
+from fee_metrics import calculate_fee_stats, display_fee_metrics
+from quantile_sketch import amount_buckets, display_amount_distribution
+from schema_validation import validate_and_quarantine, display_validation_summary
+from fx_normalization import load_fx_rates, convert_to_reporting_currency
+
+# Function to get the key of the settings the normalized transactions depend on
+def transaction_pipeline_key():
+    fx_hash = file_hash(FX_RATES_PATH) if os.path.exists(FX_RATES_PATH) else None
+    return pipeline_key(CSV_ENGINE, REPORTING_CURRENCY, fx_hash, file_hash(CURRENCY_CODES_PATH), RETRY_WINDOW)
+
+# Function to load, validate and normalize one transaction dataset.
+# The result is stored as an artifact of the file's content hash and reused until the content changes;
+# it is a shared frame, so every server process maps the same file instead of holding its own copy.
+def load_transaction_dataset(dataset_name):
+    def build():
+        raw_df = read_csv(get_dataset_path(dataset_name), TRANSACTION_COLUMN_TYPES)
+        record_schema(dataset_name, raw_df)
+
+        # Validate every column and quarantine malformed rows before normalizing
+        df, report = validate_and_quarantine(raw_df, dataset_name)
+        df = normalize_transactions(df)
+
+        # Convert every transaction to the reporting currency using the dated FX rates
+        df = convert_to_reporting_currency(df, load_fx_rates(FX_RATES_PATH), REPORTING_CURRENCY)
+
+        # Mark repeated attempts of the same transaction
+        df = mark_retries(df)
+        return df, report
+    return cached_artifact(dataset_name, f"normalized-{transaction_pipeline_key()}", build, artifact_format='frame')
+
+# Function to get the shared frame file of the normalized transactions, building it on a miss
+def get_transaction_frame_path(dataset_name):
+    artifact_name = f"normalized-{transaction_pipeline_key()}"
+    if get_artifact_path(dataset_name, artifact_name) is None:
+        load_transaction_dataset(dataset_name)
+    return get_artifact_path(dataset_name, artifact_name)
+
+# Function to load the filter bitmaps and country index of a transaction dataset
+def load_filter_index(dataset_name):
+    def build():
+        df = load_transaction_dataset(dataset_name)[0]
+        return build_filter_bitmaps(df), build_country_index(df)
+    return cached_artifact(dataset_name, f"filter-index-{transaction_pipeline_key()}", build)
+
+# Function to load the separated stats of a transaction dataset
+def load_transaction_stats(dataset_name, unique_only=False):
+    def build():
+        return query_transaction_stats(dataset_name, unique_only)
+    return cached_artifact(dataset_name, f"separated-stats-{transaction_pipeline_key()}-{unique_only}", build)
+
+# Function to load the summary view of a transaction dataset: validation report, date range, decline and
+# country breakdowns and filter options. It is small, so a page load never needs the transaction rows.
+def load_transaction_view(dataset_name):
+    def build():
+        df, report = load_transaction_dataset(dataset_name)
+        bitmaps, country_index = load_filter_index(dataset_name)
+        return {
+            'report': report,
+            'date_range': (df['date'].min(), df['date'].max()),
+            'declines': calculate_decline_view(df, build_decline_index(df)),
+            'countries': calculate_country_breakdown(df, country_index),
+            'country_values': list(country_index['categories']),
+            'filter_values': {column: filter_values(bitmaps, column) for column in FILTER_COLUMNS.values()},
+            'bitmap_bytes': bitmap_memory(bitmaps),
+            'frame_bytes': int(df.memory_usage(deep=True).sum()),
+        }
+    return cached_artifact(dataset_name, f"view-{transaction_pipeline_key()}", build)
+
+# Function to calculate the separated stats of a transaction dataset with the configured query engine.
+# Filters are apply_filters arguments ({'selections', 'start_date', 'end_date', 'country'}).
+# The polars engine runs filters and aggregation as one lazy query over the shared frame file and
+# returns the same aggregates, so both engines derive the stats with the same code.
+def query_transaction_stats(dataset_name, unique_only=False, filters=None):
+    if QUERY_ENGINE == 'polars':
+        from polars_engine import query_aggregates
+        aggregates, sketches, retried_count = query_aggregates(get_transaction_frame_path(dataset_name), unique_only, filters)
+        return calculate_stats_from_aggregates(aggregates, sketches, retried_count, unique_only)
+    return calculate_separated_stats(query_transaction_rows(dataset_name, filters), unique_only)
+
+# Function to get the (optionally filtered) rows of a transaction dataset with the configured query engine
+def query_transaction_rows(dataset_name, filters=None):
+    if QUERY_ENGINE == 'polars':
+        from polars_engine import query_rows
+        return query_rows(get_transaction_frame_path(dataset_name), filters)
+    df = load_transaction_dataset(dataset_name)[0]
+    if not filters:
+        return df
+    bitmaps, country_index = load_filter_index(dataset_name)
+    return apply_filters(df, bitmaps=bitmaps, country_index=country_index, **filters)
+
+# Function to bring an incremental store of the normalized transactions up to date with the yesterday file.
+# The store is rebuilt when the transaction pipeline settings or the inception content changed.
+def update_transaction_store(store_path, load_store, save_store, build_store, fold_rows):
+    store_key = pipeline_key(transaction_pipeline_key(), get_dataset_entry('transaction_inception')[1]['sha256'])
+    return update_incremental_store(
+        store_path, load_store, save_store, build_store, fold_rows, store_key,
+        lambda: load_transaction_dataset('transaction_inception')[0],
+        lambda: load_transaction_dataset('transaction_yesterday')[0],
+        get_dataset_entry('transaction_yesterday')[1]['sha256'],
+    )
+
+# Function to bring the stored activity counts up to date with the yesterday file
+def load_activity_counts():
+    return update_transaction_store(ACTIVITY_HEATMAP_PATH, load_activity_store, save_activity_store, build_activity_store, fold_activity_rows)['counts']
+
+# Function to bring the daily aggregate store up to date with the yesterday file
+def load_daily_aggregates():
+    return update_transaction_store(DAILY_AGGREGATES_PATH, load_daily_store, save_daily_store, build_daily_store, fold_daily_rows)['daily']
+
+# Function to bring the day-partitioned transaction history up to date with the yesterday file
+def load_transaction_history():
+    return update_transaction_store(TRANSACTION_HISTORY_DIR, load_history_index, save_history_index, build_history, fold_history_rows)['days']
+
+# Function to normalize the loaded transactions with column operations
+def normalize_transactions(df):
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')  # Convert to datetime
+    df['amount'] = df['bill_amt'].fillna(df['txn_amt'])
+    df['currency'] = currency_labels(df['bill_curr'].fillna(df['txn_curr']), load_currency_codes())
+    # Categorical status so the decline index can slice by status code
+    df['transaction_status'] = df['transaction_status'].astype('category')
+    return df
+
+# Columns the transactions are aggregated on; every stat, tile and series is derived from the result
+AGGREGATE_KEYS = ['day', 'currency', 'transaction_type', 'networkname', 'transaction_status']
+
+# Function to aggregate transactions in a single grouped pass over the rows.
+# The pass also groups by amount sketch bucket; the aggregates and the per-day amount sketches
+# are both rolled up from that (much smaller) result.
+def aggregate_transactions(df):
+    fine_aggregates = df.assign(
+        day=df['date'].dt.normalize(),
+        amount_bucket=amount_buckets(df['amount']),
+        reporting_fee=df['issuerfee'] * df['fx_rate'],
+        has_fee=df['issuerfee'].notna(),
+        unconverted=df['reporting_amount'].isna(),
+    ).groupby(AGGREGATE_KEYS + ['amount_bucket'], observed=True, dropna=False).agg(
+        count=('has_fee', 'size'),
+        amount=('amount', 'sum'),
+        reporting_amount=('reporting_amount', 'sum'),
+        unconverted=('unconverted', 'sum'),
+        fee=('issuerfee', 'sum'),
+        reporting_fee=('reporting_fee', 'sum'),
+        fee_count=('has_fee', 'sum'),
+    ).reset_index()
+    fine_aggregates['approved'] = (fine_aggregates['transaction_status'] == 'Approved').to_numpy(dtype=bool)
+
+    aggregates = fine_aggregates.groupby(AGGREGATE_KEYS + ['approved'], observed=True, dropna=False)[
+        ['count', 'amount', 'reporting_amount', 'unconverted', 'fee', 'reporting_fee', 'fee_count']
+    ].sum().reset_index()
+    sketches = fine_aggregates.groupby(
+        ['day', 'currency', 'transaction_type', 'networkname', 'approved', 'amount_bucket'], observed=True, dropna=False
+    )['count'].sum().reset_index()
+    return aggregates, sketches
+
+# Function to sum an aggregate column over the aggregate rows selected by a mask
+def sum_where(aggregates, mask, column='count'):
+    return aggregates.loc[mask, column].sum()
+
+# Function to calculate overall stats and separated stats for every currency in the data
+def calculate_separated_stats(df, unique_only=False):
+    retried_count = int(df['is_retry'].sum())
+    if unique_only:
+        df = unique_attempts(df)  # Count each attempt once with its final status
+
+    aggregates, sketches = aggregate_transactions(df)
+    return calculate_stats_from_aggregates(aggregates, sketches, retried_count, unique_only)
+
+# Function to derive the overall and per-currency stats from the transaction aggregates
+def calculate_stats_from_aggregates(aggregates, sketches, retried_count, unique_only=False):
+    approved = aggregates['approved']
+    wcredit = (aggregates['transaction_type'] == 'wcredit').to_numpy(dtype=bool)
+
     # Calculate WCredit-specific stats
-    wcredit_df = df[df['transaction_type'] == 'wcredit']
     stats = {
-        "Total Transactions": len(df),
-        "Total Approved": len(df[df['transaction_status'] == 'Approved']),
-        "Total Rejected": len(df[df['transaction_status'] != 'Approved']),
-        "WCredit Total Transactions": len(wcredit_df),
-        "WCredit Approved": len(wcredit_df[wcredit_df['transaction_status'] == 'Approved']),
-        "WCredit Rejected": len(wcredit_df[wcredit_df['transaction_status'] != 'Approved'])
+        "Total Transactions": int(aggregates['count'].sum()),
+        "Total Approved": int(sum_where(aggregates, approved)),
+        "Total Rejected": int(sum_where(aggregates, ~approved)),
+        "WCredit Total Transactions": int(sum_where(aggregates, wcredit)),
+        "WCredit Approved": int(sum_where(aggregates, approved & wcredit)),
+        "WCredit Rejected": int(sum_where(aggregates, ~approved & wcredit))
     }
 
-    # Separate stats by currency
-    separated_stats = {}
-    for currency in ['IQD', 'USD']:
-        currency_df = df[df['currency'] == currency]
-        currency_wcredit_df = wcredit_df[wcredit_df['currency'] == currency]
-        separated_stats[currency] = {
-            "Total Transactions": len(currency_df),
-            "Total Approved": len(currency_df[currency_df['transaction_status'] == 'Approved']),
-            "Total Rejected": len(currency_df[currency_df['transaction_status'] != 'Approved']),
-            "Approved Amount": currency_df[currency_df['transaction_status'] == 'Approved']['amount'].sum(),
-            "Rejected Amount": currency_df[currency_df['transaction_status'] != 'Approved']['amount'].sum(),
-            "WCredit Total Transactions": len(currency_wcredit_df),
-            "WCredit Approved": len(currency_wcredit_df[currency_wcredit_df['transaction_status'] == 'Approved']),
-            "WCredit Rejected": len(currency_wcredit_df[currency_wcredit_df['transaction_status'] != 'Approved']),
-            "WCredit Approved Amount": currency_wcredit_df[currency_wcredit_df['transaction_status'] == 'Approved']['amount'].sum(),
-            "WCredit Rejected Amount": currency_wcredit_df[currency_wcredit_df['transaction_status'] != 'Approved']['amount'].sum()
-        }
+    stats["Retried Transactions"] = retried_count
+    stats["Unique Attempts Only"] = unique_only
+
+    # Consolidated amounts across all currencies in the reporting currency
+    stats["Consolidated"] = {
+        "Reporting Currency": REPORTING_CURRENCY,
+        "Approved Amount": sum_where(aggregates, approved, 'reporting_amount'),
+        "Rejected Amount": sum_where(aggregates, ~approved, 'reporting_amount'),
+        "WCredit Approved Amount": sum_where(aggregates, approved & wcredit, 'reporting_amount'),
+        "WCredit Rejected Amount": sum_where(aggregates, ~approved & wcredit, 'reporting_amount'),
+        "Unconverted Transactions": int(aggregates['unconverted'].sum()),
+    }
+
+    # Fee revenue and per-day amount sketches from the same pass
+    stats["Fees"] = calculate_fee_stats(aggregates)
+    stats["Amount Sketches"] = sketches
+
+    # Separate stats for every currency present, busiest first, in one grouped pass over the aggregates
+    count, amount = aggregates['count'], aggregates['amount']
+    by_currency = pd.DataFrame({
+        'currency': aggregates['currency'],
+        "Total Transactions": count,
+        "Total Approved": count.where(approved, 0),
+        "Total Rejected": count.where(~approved, 0),
+        "Approved Amount": amount.where(approved, 0),
+        "Rejected Amount": amount.where(~approved, 0),
+        "WCredit Total Transactions": count.where(wcredit, 0),
+        "WCredit Approved": count.where(approved & wcredit, 0),
+        "WCredit Rejected": count.where(~approved & wcredit, 0),
+        "WCredit Approved Amount": amount.where(approved & wcredit, 0),
+        "WCredit Rejected Amount": amount.where(~approved & wcredit, 0)
+    }).groupby('currency').sum().sort_values("Total Transactions", ascending=False, kind='stable')
+    count_columns = [column for column in by_currency.columns if 'Amount' not in column]
+    by_currency[count_columns] = by_currency[count_columns].astype(int)
+    separated_stats = by_currency.to_dict('index')
     return stats, separated_stats
 
 # Function to apply filters to inception data
-def apply_filters(df, transaction_type, transaction_status, currency, start_date, end_date):
-    if transaction_type:
-        df = df[df['transaction_type'] == transaction_type]
-    if transaction_status:
-        df = df[df['transaction_status'] == transaction_status]
-    if currency:
-        df = df[df['currency'] == currency]
+# Multi-select filters ({column: [values]}) and the country are answered from the bitmaps and the
+# country index, both built over the unfiltered frame; only the date range looks at the remaining rows.
+def apply_filters(df, selections, start_date, end_date, bitmaps, country=None, country_index=None):
+    positions = filter_rows(bitmaps, selections)
+    if country:
+        positions = np.intersect1d(positions, lookup_country_rows(country_index, country), assume_unique=True)
+    df = df.iloc[positions]
     if start_date:
         df = df[df['date'] >= pd.to_datetime(start_date)]
     if end_date:
         df = df[df['date'] <= pd.to_datetime(end_date)]
     return df
 
+# Function to get a tile's delta (None when there is no baseline to compare with)
+def tile_delta(deltas, metric):
+    return deltas[metric] if deltas else None
+
+# Function to describe what the tile deltas compare
+def period_caption(deltas):
+    report_day = deltas['report_day'].date()
+    if deltas['summary'] is None:
+        return f"No {deltas['comparison'].lower()} baseline for {report_day} in the daily aggregates."
+    return f"Deltas: shown values vs {deltas['comparison'].lower()} before {report_day}, from the daily aggregates."
+
 # Function to display summary stats as metrics with color indicators
-def display_summary_tiles(stats, label="", update_date=""):
+def display_summary_tiles(stats, label="", update_date="", deltas=None):
     st.write(f"### {label} Summary Metrics")
     st.write(f"**Data Updated on:** {update_date}")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("<h6 style='color: grey;'>Total Transactions</h6>", unsafe_allow_html=True)
-        col1.metric("", stats["Total Transactions"], delta_color="off")
-        
-    with col2:
-        st.markdown("<h6 style='color: green;'>Total Approved</h6>", unsafe_allow_html=True)
-        col2.metric("", stats["Total Approved"], delta_color="normal")  # Green indicator
-        
-    with col3:
-        st.markdown("<h6 style='color: red;'>Total Rejected</h6>", unsafe_allow_html=True)
-        col3.metric("", stats["Total Rejected"], delta_color="inverse")  # Red indicator
+    if stats["Unique Attempts Only"]:
+        st.write(f"**Retried Transactions:** {stats['Retried Transactions']} (counted once per attempt)")
+    else:
+        st.write(f"**Retried Transactions:** {stats['Retried Transactions']}")
+    if deltas:
+        st.caption(period_caption(deltas))
+    summary_deltas = deltas['summary'] if deltas else None
+    render_tile_grid([[
+        tile("Total Transactions", stats["Total Transactions"], 'grey', tile_delta(summary_deltas, "Total Transactions"), 'off'),
+        tile("Total Approved", stats["Total Approved"], 'green', tile_delta(summary_deltas, "Total Approved"), 'normal'),
+        tile("Total Rejected", stats["Total Rejected"], 'red', tile_delta(summary_deltas, "Total Rejected"), 'inverse'),
+    ]], key=f"summary_{label}")
 
-# Function to display detailed separated stats for IQD and USD in tiles with color indicators
-def display_separated_stats_tiles(separated_stats, label=""):
-    st.write(f"#### {label} Metrics (IQD and USD)")
+# Function to display detailed separated stats for each currency in tiles with color indicators
+def display_separated_stats_tiles(separated_stats, label="", consolidated_stats=None, deltas=None):
+    st.write(f"#### {label} Metrics ({', '.join(separated_stats)})")
+    rows = []
     for currency, data in separated_stats.items():
-        col1, col2, col3, col4, col5 = st.columns(5)
-        with col1:
-            st.markdown(f"<h6 style='color: grey;'>{currency} Total Transactions</h6>", unsafe_allow_html=True)
-            col1.metric("", data["Total Transactions"], delta_color="off")
-        
-        with col2:
-            st.markdown(f"<h6 style='color: green;'>{currency} Total Approved</h6>", unsafe_allow_html=True)
-            col2.metric("", data["Total Approved"], delta_color="normal")  # Green
-        
-        with col3:
-            st.markdown(f"<h6 style='color: red;'>{currency} Total Rejected</h6>", unsafe_allow_html=True)
-            col3.metric("", data["Total Rejected"], delta_color="inverse")  # Red
-        
-        with col4:
-            st.markdown(f"<h6 style='color: green;'>{currency} Approved Amount</h6>", unsafe_allow_html=True)
-            col4.metric("", f"{data['Approved Amount']:.2f}", delta_color="normal")  # Green
-        
-        with col5:
-            st.markdown(f"<h6 style='color: red;'>{currency} Rejected Amount</h6>", unsafe_allow_html=True)
-            col5.metric("", f"{data['Rejected Amount']:.2f}", delta_color="inverse")  # Red
-
-        col6, col7, col8, col9, col10 = st.columns(5)
-        with col6:
-            st.markdown(f"<h6 style='color: grey;'>{currency} Loads Total Transactions</h6>", unsafe_allow_html=True)
-            col6.metric("", data["WCredit Total Transactions"], delta_color="off")
-        
-        with col7:
-            st.markdown(f"<h6 style='color: green;'>{currency} Loads Approved</h6>", unsafe_allow_html=True)
-            col7.metric("", data["WCredit Approved"], delta_color="normal")
-        
-        with col8:
-            st.markdown(f"<h6 style='color: red;'>{currency} Loads Rejected</h6>", unsafe_allow_html=True)
-            col8.metric("", data["WCredit Rejected"], delta_color="inverse")
-        
-        with col9:
-            st.markdown(f"<h6 style='color: green;'>{currency} Loads Approved Amount</h6>", unsafe_allow_html=True)
-            col9.metric("", f"{data['WCredit Approved Amount']:.2f}", delta_color="normal")
-        
-        with col10:
-            st.markdown(f"<h6 style='color: red;'>{currency} Loads Rejected Amount</h6>", unsafe_allow_html=True)
-            col10.metric("", f"{data['WCredit Rejected Amount']:.2f}", delta_color="inverse")
+        currency_deltas = deltas['currencies'].get(currency) if deltas else None
+        rows.append([
+            tile(f"{currency} Total Transactions", data["Total Transactions"], 'grey', tile_delta(currency_deltas, "Total Transactions"), 'off'),
+            tile(f"{currency} Total Approved", data["Total Approved"], 'green', tile_delta(currency_deltas, "Total Approved"), 'normal'),
+            tile(f"{currency} Total Rejected", data["Total Rejected"], 'red', tile_delta(currency_deltas, "Total Rejected"), 'inverse'),
+            tile(f"{currency} Approved Amount", f"{data['Approved Amount']:.2f}", 'green', tile_delta(currency_deltas, "Approved Amount"), 'normal'),
+            tile(f"{currency} Rejected Amount", f"{data['Rejected Amount']:.2f}", 'red', tile_delta(currency_deltas, "Rejected Amount"), 'inverse'),
+        ])
+        rows.append([
+            tile(f"{currency} Loads Total Transactions", data["WCredit Total Transactions"], 'grey', tile_delta(currency_deltas, "WCredit Total Transactions"), 'off'),
+            tile(f"{currency} Loads Approved", data["WCredit Approved"], 'green', tile_delta(currency_deltas, "WCredit Approved"), 'normal'),
+            tile(f"{currency} Loads Rejected", data["WCredit Rejected"], 'red', tile_delta(currency_deltas, "WCredit Rejected"), 'inverse'),
+            tile(f"{currency} Loads Approved Amount", f"{data['WCredit Approved Amount']:.2f}", 'green', tile_delta(currency_deltas, "WCredit Approved Amount"), 'normal'),
+            tile(f"{currency} Loads Rejected Amount", f"{data['WCredit Rejected Amount']:.2f}", 'red', tile_delta(currency_deltas, "WCredit Rejected Amount"), 'inverse'),
+        ])
+
+    # Consolidated totals converted to the reporting currency
+    if consolidated_stats:
+        currency = consolidated_stats["Reporting Currency"]
+        rows.append([
+            tile("Unconverted Transactions", consolidated_stats["Unconverted Transactions"], 'grey'),
+            tile(f"All Approved Amount ({currency})", f"{consolidated_stats['Approved Amount']:.2f}", 'green'),
+            tile(f"All Rejected Amount ({currency})", f"{consolidated_stats['Rejected Amount']:.2f}", 'red'),
+            tile(f"All Loads Approved Amount ({currency})", f"{consolidated_stats['WCredit Approved Amount']:.2f}", 'green'),
+            tile(f"All Loads Rejected Amount ({currency})", f"{consolidated_stats['WCredit Rejected Amount']:.2f}", 'red'),
+        ])
+    render_tile_grid(rows, key=f"separated_{label}")
 
+# Function to display the dashboard as of a past day: that day's tiles, fees and declines from its
+# partition alone, the inception-to-date tiles summed from the daily aggregates up to that day and
+# the card and cardholder status counts from the status histories
+def display_as_of_metrics(unique_only=False):
+    st.write("### Time Travel")
+    history_days = load_transaction_history()
+    if not history_days:
+        st.write("No transaction history.")
+        return
+    as_of = st.date_input(
+        "As of Date", value=None, min_value=pd.Timestamp(history_days[0]).date(), max_value=pd.Timestamp(history_days[-1]).date(), key="as_of_date"
+    )
+    if as_of is None:
+        return
+
+    label = f"{as_of}"
+    day_df = read_day_partition(as_of)
+    if day_df is None:
+        st.write(f"No transactions on {as_of}.")
+    else:
+        day_stats, day_separated_stats = calculate_separated_stats(day_df, unique_only)
+        display_summary_tiles(day_stats, label=label, update_date=as_of)
+        display_separated_stats_tiles(day_separated_stats, label=label, consolidated_stats=day_stats["Consolidated"])
+        display_fee_metrics(day_stats["Fees"], label=label, key_suffix="as_of")
+        display_decline_reason_metrics(calculate_decline_view(day_df, build_decline_index(day_df)), label=label, key_suffix="as_of")
+
+    inception_stats, inception_separated_stats = calculate_stats_as_of(load_daily_aggregates(), as_of, unique_only)
+    display_summary_tiles(inception_stats, label=f"Inception to {as_of}", update_date=as_of)
+    display_separated_stats_tiles(inception_separated_stats, label=f"Inception to {as_of}")
+
+    # Card and cardholder status counts reconstructed from the status histories
+    display_status_counts_as_of(as_of)
 
 # Main function to display transaction metrics with filtering options
 def display_transaction_metrics():
-    # Load the data and get creation dates
-    yesterday_df, inception_df, yesterday_date, inception_date = load_data()
+    # Load the summary views and get creation dates; the transaction rows are only read when filtering
+    yesterday_view = load_transaction_view('transaction_yesterday')
+    inception_view = load_transaction_view('transaction_inception')
+    yesterday_date = get_file_creation_date('transaction_yesterday')
+    inception_date = get_file_creation_date('transaction_inception')
+    display_validation_summary({"Yesterday": yesterday_view['report'], "Inception": inception_view['report']})
+    tile_grid_styles()
+
+    # Optionally count retried transactions once
+    unique_only = st.checkbox("Count retried transactions once (unique attempts)", value=False)
 
     # Display summary tiles for Yesterday and Inception stats with their creation dates
-    inception_stats, inception_separated_stats = calculate_separated_stats(inception_df)
+    # (aggregates are reused from the manifest while the input files are unchanged)
+    inception_stats, inception_separated_stats = load_transaction_stats('transaction_inception', unique_only)
     display_summary_tiles(inception_stats, label="Inception", update_date=inception_date)
-    display_separated_stats_tiles(inception_separated_stats, label="Inception")
+    display_separated_stats_tiles(inception_separated_stats, label="Inception", consolidated_stats=inception_stats["Consolidated"])
+
+    # Yesterday's deltas compare the displayed values with the selected baseline, looked up in the daily aggregate store
+    yesterday_stats, yesterday_separated_stats = load_transaction_stats('transaction_yesterday', unique_only)
+    comparison = select_comparison()
+    yesterday_deltas = calculate_period_deltas(
+        load_daily_aggregates(), yesterday_view['date_range'][1], comparison, yesterday_stats, yesterday_separated_stats, unique_only
+    )
+    display_summary_tiles(yesterday_stats, label="Yesterday", update_date=yesterday_date, deltas=yesterday_deltas)
+    display_separated_stats_tiles(
+        yesterday_separated_stats, label="Yesterday", consolidated_stats=yesterday_stats["Consolidated"], deltas=yesterday_deltas
+    )
+
+    # Issuer fee revenue
+    display_fee_metrics(inception_stats["Fees"], label="Inception", key_suffix="inception")
+    display_fee_metrics(yesterday_stats["Fees"], label="Yesterday", key_suffix="yesterday")
 
-    yesterday_stats, yesterday_separated_stats = calculate_separated_stats(yesterday_df)
-    display_summary_tiles(yesterday_stats, label="Yesterday", update_date=yesterday_date)
-    display_separated_stats_tiles(yesterday_separated_stats, label="Yesterday")
+    # Acquirer country breakdown from the country index
+    display_country_breakdown(inception_view['countries'], label="Inception", key_suffix="inception")
+
+    # Amount distributions merged from the per-day sketches
+    display_amount_distribution(inception_stats["Amount Sketches"], label="Inception", key_suffix="inception")
+
+    # Hour x weekday activity from the incrementally updated count array
+    display_activity_heatmap(load_activity_counts())
+
+    # Rolling-window approval rates, updated from the rows appended since the last rerun
+    # (in artifacts mode the precompute step keeps the monitor state current)
+    display_approval_alerts(get_dataset_path('transaction_yesterday'), update=DATA_MODE != 'artifacts')
+
+    # Decline reason analytics backed by the status index
+    display_decline_reason_metrics(inception_view['declines'], label="Inception", key_suffix="inception")
+    display_decline_reason_metrics(yesterday_view['declines'], label="Yesterday", key_suffix="yesterday")
+
+    # Any past day, answered from that day's partition and the daily aggregates
+    display_as_of_metrics(unique_only)
 
     # Filter Section
     st.write("### Apply Filters to Transaction Inception Data")
-    col1, col2, col3, col4, col5 = st.columns(5)
+    selections = {}
+    for filter_col, (filter_label, column) in zip(st.columns(4) + st.columns(4), FILTER_COLUMNS.items()):
+        with filter_col:
+            selections[column] = st.multiselect(filter_label, options=inception_view['filter_values'][column])
+    first_date, last_date = inception_view['date_range']
+    col1, col2, col3 = st.columns(3)
     with col1:
-        transaction_type = st.selectbox("Transaction Type", options=[None] + list(inception_df['transaction_type'].unique()), index=0)
+        start_date = st.date_input("From Date", min_value=first_date.date())
     with col2:
-        transaction_status = st.selectbox("Transaction Status", options=[None] + list(inception_df['transaction_status'].unique()), index=0)
+        end_date = st.date_input("To Date", max_value=last_date.date())
     with col3:
-        currency = st.selectbox("Currency", options=[None] + list(inception_df['currency'].unique()), index=0)
-    with col4:
-        start_date = st.date_input("From Date", min_value=inception_df['date'].min().date())
-    with col5:
-        end_date = st.date_input("To Date", max_value=inception_df['date'].max().date())
+        country = st.selectbox("Acquirer Country", options=[None, DOMESTIC, CROSS_BORDER] + inception_view['country_values'], index=0)
+    bitmap_bytes, frame_bytes = inception_view['bitmap_bytes'], inception_view['frame_bytes']
+    st.caption(f"Filter bitmaps: {bitmap_bytes / 1024:.1f} KB ({bitmap_bytes / frame_bytes * 100:.1f}% of the {frame_bytes / 1024 ** 2:.1f} MB transaction frame)")
 
     # Check if filters are applied
     if st.button("Apply Filters"):
-        filtered_df = apply_filters(inception_df, transaction_type, transaction_status, currency, start_date, end_date)
-        filtered_stats, filtered_separated_stats = calculate_separated_stats(filtered_df)
+        filters = {'selections': selections, 'start_date': start_date, 'end_date': end_date, 'country': country}
+        filtered_stats, filtered_separated_stats = query_transaction_stats('transaction_inception', unique_only, filters)
+        filtered_df = query_transaction_rows('transaction_inception', filters)
 
         # Display filtered summary and separated stats as tiles
         st.write("### Filtered Transaction Metrics")
         display_summary_tiles(filtered_stats, label="Filtered")
-        display_separated_stats_tiles(filtered_separated_stats, label="Filtered")
+        display_separated_stats_tiles(filtered_separated_stats, label="Filtered", consolidated_stats=filtered_stats["Consolidated"])
 
         # Add download button for filtered data
         csv = filtered_df.to_csv(index=False).encode('utf-8')
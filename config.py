@@ -0,0 +1,77 @@
+import os
+
+# Dashboard settings, overridable through environment variables
+
+# Currency every transaction is converted to for the consolidated totals
+REPORTING_CURRENCY = os.environ.get('NASSWALLET_REPORTING_CURRENCY', 'USD')
+
+# Dated FX rate table: one row per (date, currency) with the USD value of one unit
+FX_RATES_PATH = os.environ.get('NASSWALLET_FX_RATES_PATH', 'fx_rates.csv')
+
+# Rolling windows for the approval-rate monitor; the longest window is the baseline
+APPROVAL_WINDOWS = os.environ.get('NASSWALLET_APPROVAL_WINDOWS', '15min,1h,1D').split(',')
+
+# Percentage points a window's approval rate may fall below the baseline before alerting
+APPROVAL_DROP_THRESHOLD = float(os.environ.get('NASSWALLET_APPROVAL_DROP_THRESHOLD', '10'))
+
+# Windows with fewer transactions than this are not alerted on
+APPROVAL_MIN_TRANSACTIONS = int(os.environ.get('NASSWALLET_APPROVAL_MIN_TRANSACTIONS', '5'))
+
+# Where the approval monitor keeps its state between runs
+APPROVAL_MONITOR_STATE_PATH = os.environ.get('NASSWALLET_APPROVAL_MONITOR_STATE_PATH', 'approval_monitor_state.pkl')
+
+# Repeats of the same transaction within this window of each other are treated as retries
+RETRY_WINDOW = os.environ.get('NASSWALLET_RETRY_WINDOW', '30min')
+
+# Directory the ingest validation writes rejected transaction rows to
+QUARANTINE_DIR = os.environ.get('NASSWALLET_QUARANTINE_DIR', 'quarantine')
+
+# CSV reader: 'pandas' (single-threaded) or 'pyarrow' (multi-threaded, explicit column types)
+CSV_ENGINE = os.environ.get('NASSWALLET_CSV_ENGINE', 'pandas')
+
+# Manifest of input files (content hash, rows, schema, derived artifacts) and where artifacts are written
+MANIFEST_PATH = os.environ.get('NASSWALLET_MANIFEST_PATH', 'data_manifest.json')
+ARTIFACTS_DIR = os.environ.get('NASSWALLET_ARTIFACTS_DIR', '.artifacts')
+
+# Default file for each dataset; `python dataset_manifest.py activate <dataset> <file>` selects another one
+DATASET_FILES = {
+    'transaction_yesterday': 'transaction_yesterday.csv',
+    'transaction_inception': 'transaction_inception.csv',
+    'card_yesterday': 'card_yesterday.csv',
+    'card_inception': 'card_inception.csv',
+    'cardholder_yesterday': 'cardholder_yesterday.csv',
+    'cardholder_inception': 'cardholder_inception.csv',
+}
+
+# Hour-of-day x weekday activity counts, kept up to date from each yesterday file
+ACTIVITY_HEATMAP_PATH = os.environ.get('NASSWALLET_ACTIVITY_HEATMAP_PATH', 'activity_heatmap.npz')
+
+# Acquirer country (ISO alpha-3) treated as domestic in the country breakdown
+HOME_COUNTRY = os.environ.get('NASSWALLET_HOME_COUNTRY', 'IRQ')
+
+# Rows per page of the server-side paginated tables
+TABLE_PAGE_SIZE = int(os.environ.get('NASSWALLET_TABLE_PAGE_SIZE', '50'))
+
+# ISO 4217 lookup table (numeric code, alphabetic code, name, minor units) for the currencies accepted at ingest
+CURRENCY_CODES_PATH = os.environ.get('NASSWALLET_CURRENCY_CODES_PATH', 'currency_codes.csv')
+
+# Per-cohort onboarding funnel counts, kept up to date from each cardholder yesterday file
+ONBOARDING_FUNNEL_PATH = os.environ.get('NASSWALLET_ONBOARDING_FUNNEL_PATH', 'onboarding_funnel.pkl')
+
+# Per-day tile metrics behind the period-over-period deltas, kept up to date from each yesterday file
+DAILY_AGGREGATES_PATH = os.environ.get('NASSWALLET_DAILY_AGGREGATES_PATH', 'daily_aggregates.pkl')
+
+# Normalized transactions partitioned by day (one file per day) for the as-of-date view
+TRANSACTION_HISTORY_DIR = os.environ.get('NASSWALLET_TRANSACTION_HISTORY_DIR', 'transaction_history')
+
+# Delta-encoded daily status counts and transitions, kept up to date from each card/cardholder file
+STATUS_HISTORY_PATHS = {
+    'card': os.environ.get('NASSWALLET_CARD_STATUS_HISTORY_PATH', 'card_status_history.npz'),
+    'cardholder': os.environ.get('NASSWALLET_CARDHOLDER_STATUS_HISTORY_PATH', 'cardholder_status_history.npz'),
+}
+
+# 'live' builds missing derived artifacts at view time; 'artifacts' only reads what `python precompute.py` wrote
+DATA_MODE = os.environ.get('NASSWALLET_DATA_MODE', 'live')
+
+# Engine for the transaction stats queries: 'pandas' (eager) or 'polars' (lazy, multi-threaded; needs polars installed)
+QUERY_ENGINE = os.environ.get('NASSWALLET_QUERY_ENGINE', 'pandas')
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+from config import HOME_COUNTRY
+from transaction_index import build_category_index, category_code, lookup_codes
+
+DOMESTIC = 'Domestic'
+CROSS_BORDER = 'Cross-border'
+
+# Function to build the acquirer country index at load time
+def build_country_index(df):
+    return build_category_index(df, 'ca_country')
+
+# Function to get the country codes selected by a country filter value (a country, Domestic or Cross-border)
+def country_filter_codes(country_index, country):
+    home_code = category_code(country_index, HOME_COUNTRY)
+    if country == DOMESTIC:
+        return [home_code] if home_code != -1 else []
+    if country == CROSS_BORDER:
+        return [code for code in range(len(country_index['categories'])) if code != home_code]
+    code = category_code(country_index, country)
+    return [code] if code != -1 else []
+
+# Function to get the row positions matching a country filter value from the index
+def lookup_country_rows(country_index, country):
+    return lookup_codes(country_index, country_filter_codes(country_index, country))
+
+# Function to calculate counts, approval rate and amounts per country and currency.
+# Rows are counted straight into (country code, currency code) cells with bincount over the index codes.
+def calculate_country_breakdown(df, country_index):
+    countries = list(country_index['categories']) + ['Unknown']
+    country_codes = country_index['codes'].astype(np.int64)
+    country_codes[country_codes == -1] = len(countries) - 1
+
+    currency = pd.Categorical(df['currency'].fillna('Unknown'))
+    cells = country_codes * len(currency.categories) + currency.codes.astype(np.int64)
+    size = len(countries) * len(currency.categories)
+    approved = (df['transaction_status'] == 'Approved').to_numpy(dtype=float)
+    amount = df['amount'].fillna(0).to_numpy(dtype=float)
+
+    breakdown = pd.DataFrame({
+        'country': np.repeat(countries, len(currency.categories)),
+        'currency': np.tile(currency.categories, len(countries)),
+        'transactions': np.bincount(cells, minlength=size),
+        'approved': np.bincount(cells, weights=approved, minlength=size).astype(int),
+        'approved_amount': np.bincount(cells, weights=amount * approved, minlength=size),
+        'total_amount': np.bincount(cells, weights=amount, minlength=size),
+    })
+    breakdown = breakdown[breakdown['transactions'] > 0].reset_index(drop=True)
+    breakdown['approval_rate'] = (breakdown['approved'] / breakdown['transactions'] * 100).round(2)
+    breakdown['scope'] = np.where(
+        breakdown['country'] == HOME_COUNTRY, DOMESTIC, np.where(breakdown['country'] == 'Unknown', 'Unknown', CROSS_BORDER)
+    )
+    return breakdown.sort_values('transactions', ascending=False, ignore_index=True)
+
+# Function to summarize the country breakdown into domestic vs cross-border per currency
+def calculate_scope_split(breakdown):
+    split = breakdown.groupby(['scope', 'currency'])[['transactions', 'approved', 'approved_amount', 'total_amount']].sum().reset_index()
+    split['approval_rate'] = (split['approved'] / split['transactions'] * 100).round(2)
+    return split
+
+# Function to display the acquirer country breakdown with a map and the domestic vs cross-border split
+def display_country_breakdown(breakdown, label="", key_suffix=""):
+    st.write(f"### {label} Acquirer Countries")
+
+    by_country = breakdown.groupby('country')[['transactions', 'approved']].sum().reset_index()
+    by_country = by_country[by_country['country'] != 'Unknown']
+    fig = go.Figure(data=[go.Choropleth(
+        locations=by_country['country'], z=by_country['transactions'], locationmode='ISO-3',
+        colorscale='Blues', colorbar_title='Transactions',
+        text=(by_country['approved'] / by_country['transactions'] * 100).round(2).astype(str) + '% approved',
+    )])
+    fig.update_layout(title=f"{label} - Transactions by Acquirer Country", geo={'showframe': False})
+    st.plotly_chart(fig, key=f"country_map_{key_suffix}")
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.write("#### By Country and Currency")
+        st.dataframe(breakdown)
+    with col2:
+        st.write("#### Domestic vs Cross-border")
+        st.dataframe(calculate_scope_split(breakdown))
@@ -0,0 +1,13 @@
+import pandas as pd
+from config import CURRENCY_CODES_PATH
+
+# Function to load the ISO 4217 lookup table (numeric, alpha, name, minor_units).
+# Minor units are empty for the codes ISO lists as N.A. (precious metals, bond units, test codes).
+def load_currency_codes(path=CURRENCY_CODES_PATH):
+    return pd.read_csv(path, dtype={'numeric': 'int64', 'alpha': 'string', 'name': 'string', 'minor_units': 'Int64'})
+
+# Function to map numeric currency codes to their alphabetic codes.
+# Codes missing from the table keep their numeric form so they still show up as their own currency.
+def currency_labels(numeric_codes, currency_codes):
+    labels = dict(zip(currency_codes['numeric'].astype(str), currency_codes['alpha']))
+    return numeric_codes.astype('Int64').astype('string').replace(labels)
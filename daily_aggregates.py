@@ -0,0 +1,134 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import streamlit as st
+from config import DAILY_AGGREGATES_PATH
+from data_io import atomic_replace
+
+# Tile metrics kept per day, currency and counting mode (all attempts / unique attempts only)
+DAILY_KEYS = ['day', 'currency', 'unique_only']
+DAILY_METRICS = [
+    "Total Transactions", "Total Approved", "Total Rejected", "Approved Amount", "Rejected Amount",
+    "WCredit Total Transactions", "WCredit Approved", "WCredit Rejected", "WCredit Approved Amount", "WCredit Rejected Amount",
+    "Retried Transactions",
+]
+
+# Baselines the report day is compared with, as day offsets before the report day
+COMPARISONS = {
+    "Prior Day": [1],
+    "7-Day Average": list(range(1, 8)),
+    "Same Weekday Last Month": [28],
+}
+
+# The store holds one row per day x currency x counting mode with the tile metrics, so a comparison
+# is a lookup of a few days instead of a scan of the transaction rows. It is kept up to date as an
+# incremental store (see incremental_store.py).
+
+# Function to sum the tile metrics of transaction rows per day and currency.
+# In unique-only mode only final attempts are counted; retries are counted over every row either way.
+def daily_rows(df, unique_only=False):
+    df = df[df['date'].notna()]
+    counted = df['is_final_attempt'].to_numpy(dtype=bool) if unique_only else np.ones(len(df), dtype=bool)
+    approved = (df['transaction_status'] == 'Approved').to_numpy(dtype=bool) & counted
+    rejected = ~approved & counted
+    wcredit = (df['transaction_type'] == 'wcredit').to_numpy(dtype=bool)
+    amount = df['amount'].fillna(0).to_numpy(dtype=float)
+    daily = pd.DataFrame({
+        'day': df['date'].dt.normalize().to_numpy(),
+        'currency': df['currency'].to_numpy(dtype=object),
+        'unique_only': unique_only,
+        "Total Transactions": counted.astype(np.int64),
+        "Total Approved": approved.astype(np.int64),
+        "Total Rejected": rejected.astype(np.int64),
+        "Approved Amount": np.where(approved, amount, 0),
+        "Rejected Amount": np.where(rejected, amount, 0),
+        "WCredit Total Transactions": (counted & wcredit).astype(np.int64),
+        "WCredit Approved": (approved & wcredit).astype(np.int64),
+        "WCredit Rejected": (rejected & wcredit).astype(np.int64),
+        "WCredit Approved Amount": np.where(approved & wcredit, amount, 0),
+        "WCredit Rejected Amount": np.where(rejected & wcredit, amount, 0),
+        "Retried Transactions": df['is_retry'].to_numpy(dtype=np.int64),
+    })
+    return daily.groupby(DAILY_KEYS, dropna=False)[DAILY_METRICS].sum()
+
+# Function to build the daily aggregates of transaction rows in both counting modes
+def build_daily_aggregates(df):
+    return pd.concat([daily_rows(df, unique_only) for unique_only in (False, True)]).sort_index()
+
+# Function to load the daily aggregate store (None if nothing was stored yet or the metrics changed)
+def load_daily_store(path=DAILY_AGGREGATES_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        store = pickle.load(f)
+    return store if list(store['daily'].columns) == DAILY_METRICS else None
+
+# Function to save the daily aggregate store atomically
+def save_daily_store(store, path=DAILY_AGGREGATES_PATH):
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(store, f)
+
+# Function to build the daily aggregate store from the inception rows
+def build_daily_store(inception_df):
+    return {'daily': build_daily_aggregates(inception_df)}
+
+# Function to fold later transaction rows into the daily aggregate store
+def fold_daily_rows(store, new_rows):
+    daily = pd.concat([store['daily'], build_daily_aggregates(new_rows)])
+    store['daily'] = daily.groupby(level=DAILY_KEYS, dropna=False).sum()
+
+# Function to get the daily totals of one counting mode (all currencies, or one), with a row for every day
+def daily_totals(daily, unique_only=False, currency=None):
+    selected = daily.xs(unique_only, level='unique_only')
+    if currency is not None:
+        selected = selected[selected.index.get_level_values('currency') == currency]
+    totals = selected.groupby(level='day').sum()
+    if totals.empty:
+        return totals
+    return totals.reindex(pd.date_range(totals.index.min(), totals.index.max(), freq='D'), fill_value=0)
+
+# Function to get the change of the current values against the baseline days before a report day, per metric
+# (None without a full baseline)
+def calculate_deltas(totals, report_day, comparison, current):
+    baseline_days = [report_day - pd.Timedelta(days=offset) for offset in COMPARISONS[comparison]]
+    if totals.empty or current is None or min(baseline_days) < totals.index.min():
+        return None
+    # Days after the last stored day had no transactions
+    baseline = totals.reindex(baseline_days, fill_value=0).mean()
+    return {metric: round(float(current[metric] - baseline[metric]), 2) for metric in DAILY_METRICS if metric in current}
+
+# Function to get the overall and per-currency deltas of the displayed stats against the baseline before a report day.
+# The current values are the displayed ones, so each delta is the change of the number on its tile.
+# None when the yesterday file has no dated rows.
+def calculate_period_deltas(daily, report_day, comparison, stats, separated_stats, unique_only=False):
+    # A quiet day's file has no dated rows, so there is no report day to compare
+    if pd.isna(report_day):
+        return None
+    report_day = pd.Timestamp(report_day).normalize()
+    return {
+        'report_day': report_day,
+        'comparison': comparison,
+        'summary': calculate_deltas(daily_totals(daily, unique_only), report_day, comparison, stats),
+        'currencies': {
+            currency: calculate_deltas(daily_totals(daily, unique_only, currency), report_day, comparison, data)
+            for currency, data in separated_stats.items()
+        },
+    }
+
+# Function to get the inception-to-date tile stats as of a day by summing the daily aggregates up to it
+def calculate_stats_as_of(daily, as_of, unique_only=False):
+    selected = daily.xs(unique_only, level='unique_only')
+    selected = selected[selected.index.get_level_values('day') <= pd.Timestamp(as_of)]
+    by_currency = selected.groupby(level='currency', dropna=False).sum().sort_values("Total Transactions", ascending=False, kind='stable')
+    count_columns = [column for column in DAILY_METRICS if 'Amount' not in column]
+    by_currency[count_columns] = by_currency[count_columns].astype(int)
+    totals = by_currency[count_columns].sum()
+    stats = {column: int(totals[column]) for column in count_columns}
+    stats["Unique Attempts Only"] = unique_only
+    return stats, by_currency.drop(columns="Retried Transactions").to_dict('index')
+
+# Function to let the viewer pick the baseline the yesterday tiles are compared with
+def select_comparison():
+    return st.selectbox("Compare Yesterday With", options=list(COMPARISONS), index=0)
@@ -0,0 +1,103 @@
+import os
+import fcntl
+import tempfile
+from contextlib import contextmanager
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from config import CSV_ENGINE
+
+# Explicit column types for the input files ('string' columns are never inferred as numbers)
+TRANSACTION_COLUMN_TYPES = {
+    'itc': 'string', 'transaction_type': 'string', 'pos_entry_mode': 'string',
+    'CARD_PRESENT/CARD_NOT_PRESENT': 'string', 'transaction_status': 'string', 'ca_name': 'string',
+    'ca_city': 'string', 'ca_country': 'string', 'date': 'string', 'eci': 'string', 'txn_amt': 'float64',
+    'txn_curr': 'float64', 'bill_curr': 'float64', 'bill_amt': 'float64', 'issuerfee': 'float64',
+    'networkname': 'string', 'mcc': 'float64',
+}
+STATUS_COUNT_COLUMN_TYPES = {'status': 'string', 'count': 'int64'}
+STATUS_CHANGE_COLUMN_TYPES = {'operation': 'string', 'newstate': 'string', 'count': 'int64'}
+
+PYARROW_TYPES = {'string': pa.string(), 'float64': pa.float64(), 'int64': pa.int64()}
+
+# Leading bytes of the supported compressed formats
+COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'\x28\xb5\x2f\xfd': 'zstd'}
+COMPRESSED_SUFFIXES = ['.gz', '.zst']
+
+# Function to find the file for a dataset, accepting plain or compressed variants
+def resolve_data_path(path):
+    for candidate in [path] + [path + suffix for suffix in COMPRESSED_SUFFIXES]:
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"No data file found for {path} (tried .csv, .csv.gz, .csv.zst)")
+
+# Function to detect the compression of a file from its leading bytes
+def detect_compression(path):
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+# Function to open a data file as a stream that decompresses while it is read
+def open_data_stream(path):
+    return pa.input_stream(path, compression=detect_compression(path))
+
+# Permissions of a newly created file under the process umask (read once: reading it means setting it)
+PROCESS_UMASK = os.umask(0)
+os.umask(PROCESS_UMASK)
+NEW_FILE_MODE = 0o666 & ~PROCESS_UMASK
+
+# Function to write a file atomically: yields a unique temporary path next to the target and renames it
+# over the target once written, so concurrent writers never share a temporary file and readers only
+# ever see a complete file. The temporary file is created private (0600), so it is given the usual
+# mode before the rename; otherwise a dashboard running as another user could not read what precompute wrote.
+@contextmanager
+def atomic_replace(path, suffix='.tmp'):
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f".{os.path.basename(path)}.", suffix=suffix)
+    os.close(handle)
+    try:
+        yield temp_path
+        os.chmod(temp_path, NEW_FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+# Function to hold an exclusive lock (shared by every process on the host) while a block runs
+@contextmanager
+def file_lock(path):
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# Function to read a CSV file with the multi-threaded pyarrow reader and explicit column types.
+# If a numeric column holds malformed values it is re-read as text so ingest validation can quarantine the rows.
+def read_csv_pyarrow(path, column_types):
+    convert_options = pa_csv.ConvertOptions(
+        column_types={column: PYARROW_TYPES[column_type] for column, column_type in column_types.items()},
+        strings_can_be_null=True,
+    )
+    try:
+        with open_data_stream(path) as stream:
+            table = pa_csv.read_csv(stream, convert_options=convert_options)
+    except pa.ArrowInvalid:
+        convert_options.column_types = {column: pa.string() for column in column_types}
+        with open_data_stream(path) as stream:
+            table = pa_csv.read_csv(stream, convert_options=convert_options)
+    return table.to_pandas()
+
+# Function to read a CSV data file (plain, gzip or zstd) with the configured reader
+def read_csv(path, column_types=None, engine=CSV_ENGINE):
+    column_types = column_types or {}
+    if engine == 'pyarrow':
+        return read_csv_pyarrow(path, column_types)
+    # Only text columns are pinned for pandas; numeric columns are inferred so malformed values surface in validation
+    dtype = {column: str for column, column_type in column_types.items() if column_type == 'string'}
+    with open_data_stream(path) as stream:
+        return pd.read_csv(stream, dtype=dtype)
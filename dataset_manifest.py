@@ -0,0 +1,237 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+from contextlib import contextmanager
+from config import MANIFEST_PATH, ARTIFACTS_DIR, DATASET_FILES, DATA_MODE
+from data_io import resolve_data_path, atomic_replace, file_lock
+from shared_frames import write_shared_frame, read_shared_frame
+
+# Bump when a change to the pipeline invalidates previously written artifacts
+PIPELINE_VERSION = 2
+
+# The manifest records, per dataset, the active input file and for each file seen its content hash,
+# size/mtime, row count, schema and the derived artifacts built from it. Artifacts are keyed by the
+# content hash, so a refresh that drops identical content reuses them instead of reprocessing.
+# Only the active content and the one before it (which other processes may still have mapped) keep
+# their artifacts; older versions are deleted when new content is seen. Every read-modify-write of
+# the manifest holds its lock, so concurrent processes never lose each other's updates.
+
+# The manifest as refreshed at the start of the current dashboard rerun (see refresh_manifest). Lookups
+# in the rerun read it instead of re-reading the manifest and stat-ing the files on every call; outside
+# the dashboard it stays None and each lookup checks the file itself.
+rerun_manifest = None
+
+# Function to load the manifest (an empty one if it does not exist yet)
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {'datasets': {}}
+    with open(path) as f:
+        return json.load(f)
+
+# Function to save the manifest atomically
+def save_manifest(manifest, path=MANIFEST_PATH):
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+# Function to load the manifest under its lock and save it when the block is done
+@contextmanager
+def locked_manifest(path=MANIFEST_PATH):
+    global rerun_manifest
+    with file_lock(path):
+        manifest = load_manifest(path)
+        yield manifest
+        save_manifest(manifest, path)
+    # Later lookups in the rerun see what was just recorded
+    if rerun_manifest is not None and path == MANIFEST_PATH:
+        rerun_manifest = manifest
+
+# Function to hash a file's content
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Function to build a short key from the settings a derived artifact depends on
+def pipeline_key(*parts):
+    return hashlib.sha256(json.dumps([PIPELINE_VERSION, *parts], default=str).encode()).hexdigest()[:12]
+
+# Function to get the file currently selected for a dataset
+def get_active_file(manifest, dataset_name):
+    dataset = manifest['datasets'].get(dataset_name, {})
+    return dataset.get('active_file') or resolve_data_path(DATASET_FILES[dataset_name])
+
+# Function to delete the artifacts of content that is neither active nor the previous version
+def prune_artifacts(dataset_name, dataset):
+    keep = {sha256[:16] for sha256 in (dataset.get('active_sha256'), dataset.get('previous_sha256')) if sha256}
+    dataset_dir = os.path.join(ARTIFACTS_DIR, dataset_name)
+    if os.path.isdir(dataset_dir):
+        for name in os.listdir(dataset_dir):
+            if name not in keep:
+                shutil.rmtree(os.path.join(dataset_dir, name), ignore_errors=True)
+
+# Function to check whether a dataset's manifest entry still matches its active file's size and mtime
+def is_entry_current(manifest, dataset_name):
+    path = get_active_file(manifest, dataset_name)
+    entry = manifest['datasets'].get(dataset_name, {}).get('files', {}).get(path)
+    stat = os.stat(path)
+    return entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+# Function to bring a dataset's manifest entry up to date with its active file.
+# The file is only re-hashed when its size or mtime changed; identical content keeps its artifacts.
+def refresh_dataset(manifest, dataset_name):
+    dataset = manifest['datasets'].setdefault(dataset_name, {'active_file': None, 'files': {}})
+    path = get_active_file(manifest, dataset_name)
+    stat = os.stat(path)
+    entry = dataset['files'].get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry, False
+
+    sha256 = file_hash(path)
+    created = datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+    if entry and entry['sha256'] == sha256:
+        # Identical content dropped again keeps its artifacts but is dated by the new drop
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, created=created)
+    else:
+        entry = {
+            'sha256': sha256,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'created': created,
+            'rows': None,
+            'schema': None,
+            'artifacts': {},
+        }
+    if dataset.get('active_sha256') != sha256:
+        dataset['previous_sha256'] = dataset.get('active_sha256')
+        dataset['active_sha256'] = sha256
+    # Entries of files that are no longer active are dropped, and their artifacts pruned
+    dataset['files'] = {path: entry}
+    prune_artifacts(dataset_name, dataset)
+    return entry, True
+
+# Function to refresh every dataset's manifest entry once, at the start of a dashboard rerun
+def refresh_manifest():
+    global rerun_manifest
+    manifest = load_manifest()
+    if not all(is_entry_current(manifest, dataset_name) for dataset_name in DATASET_FILES):
+        with locked_manifest() as manifest:
+            for dataset_name in DATASET_FILES:
+                refresh_dataset(manifest, dataset_name)
+    rerun_manifest = manifest
+
+# Function to get the up-to-date manifest entry (and path) of a dataset's active file. A changed file
+# is only hashed under the manifest lock, so the refresh is done once and saved.
+def get_dataset_entry(dataset_name):
+    manifest = rerun_manifest
+    if manifest is None or dataset_name not in manifest['datasets']:
+        manifest = load_manifest()
+        if not is_entry_current(manifest, dataset_name):
+            with locked_manifest() as manifest:
+                refresh_dataset(manifest, dataset_name)
+    path = get_active_file(manifest, dataset_name)
+    return path, manifest['datasets'][dataset_name]['files'][path]
+
+# Function to get the file path of a dataset's active file
+def get_dataset_path(dataset_name):
+    return get_dataset_entry(dataset_name)[0]
+
+# Function to get the creation date recorded for a dataset's active file
+def get_file_creation_date(dataset_name):
+    return get_dataset_entry(dataset_name)[1]['created']
+
+# Function to record the row count and schema of a dataset's active file after it was parsed
+def record_schema(dataset_name, df):
+    entry = get_dataset_entry(dataset_name)[1]
+    schema = {column: str(dtype) for column, dtype in df.dtypes.items()}
+    if entry['rows'] != len(df) or entry['schema'] != schema:
+        with locked_manifest() as manifest:
+            entry, _ = refresh_dataset(manifest, dataset_name)
+            entry.update(rows=len(df), schema=schema)
+
+# Function to get the recorded file of a derived artifact for a dataset's active file (None if not built yet)
+def get_artifact_path(dataset_name, artifact_name):
+    entry = get_dataset_entry(dataset_name)[1]
+    artifact_path = entry['artifacts'].get(artifact_name)
+    return artifact_path if artifact_path and os.path.exists(artifact_path) else None
+
+# Function to write a pickled artifact atomically
+def write_pickle_artifact(result, path):
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(result, f)
+
+# Function to read a pickled artifact
+def read_pickle_artifact(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+# Function to write a (frame, metadata) artifact as a shared Arrow file
+def write_frame_artifact(result, path):
+    df, metadata = result
+    write_shared_frame(df, path, metadata)
+
+# Artifact formats: file suffix, writer and reader. 'frame' artifacts are (DataFrame, JSON metadata)
+# pairs that every server process memory-maps instead of holding its own copy.
+ARTIFACT_FORMATS = {
+    'pickle': ('.pkl', write_pickle_artifact, read_pickle_artifact),
+    'frame': ('.arrow', write_frame_artifact, read_shared_frame),
+}
+
+# Function to load a derived artifact for a dataset's active file, building and recording it on a miss.
+# Artifacts are written under a unique temporary name and renamed, and only recorded in the manifest
+# once complete, so a process never reads a half-written version. Building holds a per-artifact lock:
+# when several processes miss at once, one builds and the others wait and then read its result.
+# In 'artifacts' mode nothing is built: a miss means the precompute step has not run for this file.
+def cached_artifact(dataset_name, artifact_name, build, artifact_format='pickle'):
+    suffix, write_artifact, read_artifact = ARTIFACT_FORMATS[artifact_format]
+    dataset_path, entry = get_dataset_entry(dataset_name)
+    artifact_path = entry['artifacts'].get(artifact_name)
+    if artifact_path and os.path.exists(artifact_path):
+        return read_artifact(artifact_path)
+    if DATA_MODE == 'artifacts':
+        raise FileNotFoundError(
+            f"No '{artifact_name}' artifact for {dataset_name} ({dataset_path}); run `python precompute.py`"
+        )
+
+    artifact_dir = os.path.join(ARTIFACTS_DIR, dataset_name, entry['sha256'][:16])
+    os.makedirs(artifact_dir, exist_ok=True)
+    artifact_path = os.path.join(artifact_dir, f"{artifact_name}{suffix}")
+    with file_lock(artifact_path):
+        # Another process may have built it while this one waited for the lock
+        if os.path.exists(artifact_path):
+            result = read_artifact(artifact_path)
+        else:
+            result = build()
+            write_artifact(result, artifact_path)
+
+    # Re-read the manifest under its lock, as the build step or other processes may have updated it
+    with locked_manifest() as manifest:
+        entry, _ = refresh_dataset(manifest, dataset_name)
+        entry['artifacts'][artifact_name] = artifact_path
+    return result
+
+# Manage the manifest from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or update the dataset manifest")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('refresh', help="hash the active file of every dataset")
+    activate_parser = subparsers.add_parser('activate', help="select the active file of a dataset")
+    activate_parser.add_argument('dataset', choices=sorted(DATASET_FILES))
+    activate_parser.add_argument('file')
+    args = parser.parse_args()
+
+    if args.command == 'activate' and not os.path.exists(args.file):
+        parser.error(f"{args.file} does not exist")
+    with locked_manifest() as data_manifest:
+        if args.command == 'activate':
+            data_manifest['datasets'].setdefault(args.dataset, {'active_file': None, 'files': {}})['active_file'] = args.file
+        for name in DATASET_FILES:
+            file_entry, _ = refresh_dataset(data_manifest, name)
+            print(f"{name}: {get_active_file(data_manifest, name)} sha256={file_entry['sha256'][:16]} rows={file_entry['rows']}")
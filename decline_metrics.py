@@ -0,0 +1,118 @@
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+from transaction_index import build_category_index, category_code, lookup_codes
+
+# Decline messages that carry per-transaction details (amounts, velocity ids) are folded into one reason
+DECLINE_REASON_RULES = [
+    (re.compile(r'^required amount', re.IGNORECASE), 'Required amount not available'),
+    (re.compile(r'^advance velocity cumulative amount limit', re.IGNORECASE), 'Velocity cumulative amount limit exceeded'),
+    (re.compile(r'^fraud\.check\.error', re.IGNORECASE), 'Fraud check error'),
+]
+UNKNOWN_REASON = 'Unknown'
+
+# Function to map a raw transaction status to its decline reason
+def normalize_decline_reason(status):
+    for pattern, reason in DECLINE_REASON_RULES:
+        if pattern.match(status):
+            return reason
+    status = status.strip()
+    return status[:1].upper() + status[1:]
+
+# Function to build the decline reason index at load time.
+# Reasons are resolved once per distinct status (not per row) and every row gets a reason code,
+# so slicing by a reason is a lookup of its status codes in the status index.
+def build_decline_index(df):
+    status_index = build_category_index(df, 'transaction_status')
+    approved_code = category_code(status_index, 'Approved')
+
+    status_reasons = [normalize_decline_reason(status) for status in status_index['categories']]
+    reasons = sorted(set(reason for code, reason in enumerate(status_reasons) if code != approved_code))
+    reasons.append(UNKNOWN_REASON)
+    reason_lookup = {reason: code for code, reason in enumerate(reasons)}
+
+    # Slot 0 holds missing statuses, slot code + 1 holds each status category
+    reason_of_status = np.array([reason_lookup[UNKNOWN_REASON]] + [reason_lookup.get(reason, -1) for reason in status_reasons])
+    reason_status_codes = {reason: [] for reason in reasons}
+    reason_status_codes[UNKNOWN_REASON].append(-1)
+    for code, reason in enumerate(status_reasons):
+        if code != approved_code:
+            reason_status_codes[reason].append(code)
+
+    return {
+        'status_index': status_index,
+        'approved_code': approved_code,
+        'reasons': reasons,
+        'reason_codes': reason_of_status[status_index['codes'] + 1],
+        'reason_status_codes': reason_status_codes,
+    }
+
+# Function to get the declined rows with their decline reason as a categorical column
+def get_declined_rows(df, decline_index, reason=None):
+    if reason is None:
+        positions = np.flatnonzero(decline_index['status_index']['codes'] != decline_index['approved_code'])
+    else:
+        positions = lookup_codes(decline_index['status_index'], decline_index['reason_status_codes'][reason])
+    declined_df = df.iloc[positions].copy()
+    declined_df['decline_reason'] = pd.Categorical.from_codes(decline_index['reason_codes'][positions], decline_index['reasons'])
+    return declined_df
+
+# Function to count declines per reason straight from the reason codes
+def calculate_decline_counts(decline_index):
+    reason_codes = decline_index['reason_codes']
+    declined_codes = reason_codes[decline_index['status_index']['codes'] != decline_index['approved_code']]
+    counts = np.bincount(declined_codes, minlength=len(decline_index['reasons']))
+    return pd.Series(counts, index=decline_index['reasons'], name='counts').sort_values(ascending=False)
+
+# Function to calculate the decline breakdown by reason x currency x transaction type x network
+def calculate_decline_breakdown(declined_df):
+    breakdown = declined_df.groupby(
+        ['decline_reason', 'currency', 'transaction_type', 'networkname'], observed=True, dropna=False
+    ).agg(counts=('decline_reason', 'size'), amount=('amount', 'sum')).reset_index()
+    return breakdown.sort_values('counts', ascending=False, ignore_index=True)
+
+# Function to calculate the daily decline trend per reason
+def calculate_decline_trend(declined_df):
+    trend = declined_df.groupby([declined_df['date'].dt.date, 'decline_reason'], observed=True).size()
+    return trend.unstack(fill_value=0).sort_index()
+
+# Function to calculate everything the decline panel shows: the counts, and the breakdown and trend
+# for all declines and for each reason (keyed by reason, None for all)
+def calculate_decline_view(df, decline_index):
+    decline_counts = calculate_decline_counts(decline_index)
+    decline_counts = decline_counts[decline_counts > 0]
+    breakdowns, trends = {}, {}
+    for reason in [None] + list(decline_counts.index):
+        declined_df = get_declined_rows(df, decline_index, reason)
+        breakdowns[reason] = calculate_decline_breakdown(declined_df)
+        trends[reason] = calculate_decline_trend(declined_df)
+    return {'counts': decline_counts, 'breakdowns': breakdowns, 'trends': trends}
+
+# Function to display the decline reason analytics panel
+def display_decline_reason_metrics(decline_view, label="", key_suffix=""):
+    st.write(f"### {label} Decline Reasons")
+    decline_counts = decline_view['counts']
+    if decline_counts.empty:
+        st.write("No declined transactions.")
+        return
+
+    fig = go.Figure(data=[go.Bar(x=decline_counts.values, y=decline_counts.index, orientation='h')])
+    fig.update_layout(title=f"{label} - Declines by Reason", yaxis={'autorange': 'reversed'}, height=max(300, 28 * len(decline_counts)))
+    st.plotly_chart(fig, key=f"decline_reason_chart_{key_suffix}")
+
+    reason = st.selectbox("Decline Reason", options=[None] + list(decline_counts.index), index=0, key=f"decline_reason_{key_suffix}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("#### Reason x Currency x Transaction Type x Network")
+        st.dataframe(decline_view['breakdowns'][reason])
+    with col2:
+        st.write("#### Decline Trend")
+        trend = decline_view['trends'][reason]
+        fig = go.Figure()
+        for column in trend.columns:
+            fig.add_trace(go.Scatter(x=trend.index, y=trend[column], mode='lines', name=column))
+        fig.update_layout(title=f"{label} - Daily Declines")
+        st.plotly_chart(fig, key=f"decline_trend_chart_{key_suffix}")
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from config import RETRY_WINDOW
+
+# Columns that identify the same transaction being attempted again
+RETRY_KEY_COLUMNS = ['itc', 'ca_name', 'txn_amt', 'txn_curr', 'networkname']
+
+# Function to put values computed in sorted order back into the original row order
+def scatter(sorted_values, order):
+    values = np.empty_like(sorted_values)
+    values[order] = sorted_values
+    return values
+
+# Function to mark retried transactions.
+# Every row is hashed on the retry key, rows are sorted by (hash, date) and a row is a retry when
+# the previous row has the same hash and happened within the window, so repeats chain into one
+# attempt. The last row of each attempt carries its final outcome.
+def mark_retries(df, window=RETRY_WINDOW):
+    key_hash = pd.util.hash_pandas_object(df[RETRY_KEY_COLUMNS], index=False).to_numpy()
+    dates = df['date'].to_numpy(dtype='datetime64[ns]')
+    valid_date = ~np.isnat(dates)
+    timestamps = dates.view(np.int64)
+
+    order = np.lexsort((timestamps, key_hash))
+    sorted_hash, sorted_timestamps, sorted_valid = key_hash[order], timestamps[order], valid_date[order]
+
+    retry = np.zeros(len(df), dtype=bool)
+    retry[1:] = (
+        (sorted_hash[1:] == sorted_hash[:-1])
+        & (np.diff(sorted_timestamps) <= pd.Timedelta(window).value)
+        & sorted_valid[1:] & sorted_valid[:-1]
+    )
+    final_attempt = np.ones(len(df), dtype=bool)
+    final_attempt[:-1] = ~retry[1:]
+
+    # Scatter the results back to the original row order
+    df['is_retry'] = scatter(retry, order)
+    df['is_final_attempt'] = scatter(final_attempt, order)
+    df['attempt_id'] = scatter(np.cumsum(~retry) - 1, order)
+    return df
+
+# Function to keep one row per attempt, carrying the attempt's final outcome
+def unique_attempts(df):
+    return df[df['is_final_attempt']]
@@ -0,0 +1,53 @@
+import streamlit as st
+import plotly.graph_objs as go
+from config import REPORTING_CURRENCY
+
+# Function to add average fee and fee-to-volume ratio columns to summed fee aggregates
+def add_fee_ratios(fee_totals):
+    fee_totals['average_fee'] = (fee_totals['fee'] / fee_totals['fee_count'].where(fee_totals['fee_count'] > 0)).round(2)
+    fee_totals['fee_to_volume_pct'] = (fee_totals['fee'] / fee_totals['amount'].where(fee_totals['amount'] > 0) * 100).round(4)
+    return fee_totals
+
+# Function to calculate issuer fee revenue from the transaction aggregates (approved transactions only).
+# Fees are charged in the transaction's currency, so every breakdown is kept per currency.
+def calculate_fee_stats(aggregates):
+    approved = aggregates[aggregates['approved']]
+    columns = ['fee', 'fee_count', 'amount', 'count']
+
+    by_currency = add_fee_ratios(approved.groupby('currency', dropna=False)[columns].sum())
+    by_transaction_type = add_fee_ratios(approved.groupby(['currency', 'transaction_type'], dropna=False)[columns].sum())
+    by_network = add_fee_ratios(approved.groupby(['currency', 'networkname'], dropna=False)[columns].sum())
+    daily = approved.groupby(['day', 'currency'], dropna=False)[['fee', 'amount', 'reporting_fee']].sum().reset_index()
+
+    return {
+        "Reporting Currency": REPORTING_CURRENCY,
+        "Total Fee Revenue": approved['reporting_fee'].sum(),
+        "By Currency": by_currency.reset_index(),
+        "By Transaction Type": by_transaction_type[by_transaction_type['fee_count'] > 0].reset_index(),
+        "By Network": by_network[by_network['fee_count'] > 0].reset_index(),
+        "Daily": daily,
+    }
+
+# Function to display issuer fee revenue tables and the daily fee trend
+def display_fee_metrics(fee_stats, label="", key_suffix=""):
+    st.write(f"### {label} Issuer Fee Revenue")
+    st.markdown(f"<h6 style='color: green;'>Total Fee Revenue ({fee_stats['Reporting Currency']})</h6>", unsafe_allow_html=True)
+    st.metric("Total Fee Revenue", f"{fee_stats['Total Fee Revenue']:.2f}", label_visibility="collapsed")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.write("#### By Currency")
+        st.dataframe(fee_stats["By Currency"])
+    with col2:
+        st.write("#### By Transaction Type")
+        st.dataframe(fee_stats["By Transaction Type"])
+    with col3:
+        st.write("#### By Network")
+        st.dataframe(fee_stats["By Network"])
+
+    daily = fee_stats["Daily"].dropna(subset=['day'])
+    fig = go.Figure()
+    for currency, currency_daily in daily.groupby('currency'):
+        fig.add_trace(go.Scatter(x=currency_daily['day'], y=currency_daily['fee'], mode='lines', name=str(currency)))
+    fig.update_layout(title=f"{label} - Daily Fee Revenue")
+    st.plotly_chart(fig, key=f"fee_trend_chart_{key_suffix}")
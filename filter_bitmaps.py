@@ -0,0 +1,59 @@
+import numpy as np
+from transaction_index import build_category_index
+
+# Multi-select filter dimensions, by label
+FILTER_COLUMNS = {
+    "Transaction Type": 'transaction_type',
+    "Transaction Status": 'transaction_status',
+    "Currency": 'currency',
+    "POS Entry Mode": 'pos_entry_mode',
+    "Card Presence": 'CARD_PRESENT/CARD_NOT_PRESENT',
+    "ECI": 'eci',
+    "Network": 'networkname',
+    "MCC": 'mcc',
+}
+
+# Each filter value gets a packed bit array (one bit per row) built once at load. A filter
+# combination is answered by OR-ing the bitmaps of the values selected within a column and
+# AND-ing the columns together, so it costs len(df) / 8 bytes per selected value instead of
+# a comparison over every row.
+
+# Function to build the per-value bitmaps of every filter column
+def build_filter_bitmaps(df, columns=FILTER_COLUMNS.values()):
+    row_count = len(df)
+    bitmaps = {'rows': row_count, 'columns': {}}
+    for column in columns:
+        index = build_category_index(df, column)
+        offsets, order = index['offsets'], index['order']
+        column_bitmaps = np.empty((len(index['categories']), (row_count + 7) // 8), dtype=np.uint8)
+        for code in range(len(index['categories'])):
+            bits = np.zeros(row_count, dtype=bool)
+            bits[order[offsets[code + 1]:offsets[code + 2]]] = True
+            column_bitmaps[code] = np.packbits(bits)
+        bitmaps['columns'][column] = {'values': list(index['categories']), 'bitmaps': column_bitmaps}
+    return bitmaps
+
+# Function to get the values that can be selected for a filter column
+def filter_values(bitmaps, column):
+    return bitmaps['columns'][column]['values']
+
+# Function to get the packed bitmap of the rows matching every column's selected values
+def combine_bitmaps(bitmaps, selections):
+    result = np.full((bitmaps['rows'] + 7) // 8, 0xFF, dtype=np.uint8)
+    for column, values in selections.items():
+        if not values:
+            continue
+        column_bitmaps = bitmaps['columns'][column]
+        codes = [column_bitmaps['values'].index(value) for value in values if value in column_bitmaps['values']]
+        if not codes:
+            return np.zeros_like(result)
+        result &= np.bitwise_or.reduce(column_bitmaps['bitmaps'][codes], axis=0)
+    return result
+
+# Function to get the row positions matching a filter selection ({column: [values]})
+def filter_rows(bitmaps, selections):
+    return np.flatnonzero(np.unpackbits(combine_bitmaps(bitmaps, selections), count=bitmaps['rows']))
+
+# Function to get the memory held by the bitmaps, in bytes
+def bitmap_memory(bitmaps):
+    return sum(column['bitmaps'].nbytes for column in bitmaps['columns'].values())
@@ -0,0 +1,46 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Function to load the dated FX rate table (date, currency, usd_rate)
+def load_fx_rates(path):
+    if not os.path.exists(path):
+        return None
+    rates = pd.read_csv(path, dtype={'currency': 'string'})
+    rates['date'] = pd.to_datetime(rates['date'], errors='coerce')
+    rates = rates.dropna(subset=['date', 'currency', 'usd_rate'])
+    return rates.sort_values('date', kind='stable', ignore_index=True)
+
+# Function to look up the USD rate in effect on each date for each currency.
+# A vectorized as-of join: the latest rate on or before the date, falling back to the
+# earliest known rate for dates before the table starts.
+def asof_usd_rates(dates, currencies, rates):
+    usd_rates = np.full(len(dates), np.nan)
+    left = pd.DataFrame({'date': dates, 'currency': currencies, 'position': np.arange(len(dates))})
+    left = left.dropna(subset=['date', 'currency']).sort_values('date', kind='stable')
+    if left.empty:
+        return usd_rates
+    # The join keys must share a unit; parsed dates come out at whatever unit their text needs
+    left['date'] = left['date'].astype('datetime64[ns]')
+    right = rates[['date', 'currency', 'usd_rate']].assign(date=rates['date'].astype('datetime64[ns]'))
+
+    backward = pd.merge_asof(left, right, on='date', by='currency', direction='backward')
+    forward = pd.merge_asof(left, right, on='date', by='currency', direction='forward')
+
+    usd_rates[backward['position'].to_numpy()] = backward['usd_rate'].fillna(forward['usd_rate']).to_numpy()
+    return usd_rates
+
+# Function to convert every transaction amount to the reporting currency as column operations
+def convert_to_reporting_currency(df, rates, reporting_currency):
+    in_reporting_currency = df['currency'].eq(reporting_currency).fillna(False).to_numpy(dtype=bool)
+    if rates is None:
+        df['fx_rate'] = np.where(in_reporting_currency, 1.0, np.nan)
+    else:
+        currency_usd = asof_usd_rates(df['date'], df['currency'], rates)
+        if reporting_currency == 'USD':
+            reporting_usd = 1.0
+        else:
+            reporting_usd = asof_usd_rates(df['date'], pd.Series(reporting_currency, index=df.index, dtype='string'), rates)
+        df['fx_rate'] = np.where(in_reporting_currency, 1.0, currency_usd / reporting_usd)
+    df['reporting_amount'] = df['amount'] * df['fx_rate']
+    return df
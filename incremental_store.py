@@ -0,0 +1,41 @@
+from data_io import file_lock
+
+# Incremental stores (activity heatmap, daily aggregates, transaction history) are built once from the
+# inception data; afterwards each new yesterday file (by content hash) is folded in, adding only rows
+# later than anything already counted. A store records the key it was built under (the settings its
+# rows were derived with and the inception content) and is rebuilt when that key changes. Building and
+# folding hold the store's lock, so concurrent sessions never fold the same file twice or lose updates.
+
+# Function to check whether a store is up to date with the key and the yesterday file
+def is_store_current(store, store_key, yesterday_hash):
+    return store is not None and store.get('key') == store_key and yesterday_hash in store['folded']
+
+# Function to bring an incremental store up to date with the yesterday file.
+# load_store()/save_store(store) read and write the store dict (None when nothing was stored yet),
+# build_store(inception_df) creates its contents and fold_rows(store, new_rows) adds later rows;
+# lock_path names the store's lock. The frames are passed as loader functions so they are only read
+# when there is something to fold in.
+def update_incremental_store(lock_path, load_store, save_store, build_store, fold_rows, store_key, load_inception_df, load_yesterday_df, yesterday_hash):
+    store = load_store()
+    if is_store_current(store, store_key, yesterday_hash):
+        return store
+
+    with file_lock(lock_path):
+        # Another process may have brought the store up to date while this one waited for the lock
+        store = load_store()
+        if is_store_current(store, store_key, yesterday_hash):
+            return store
+
+        if store is None or store.get('key') != store_key:
+            inception_df = load_inception_df()
+            store = build_store(inception_df)
+            store.update(key=store_key, watermark=inception_df['date'].max(), folded=[])
+
+        yesterday_df = load_yesterday_df()
+        new_rows = yesterday_df[yesterday_df['date'] > store['watermark']]
+        if not new_rows.empty:
+            fold_rows(store, new_rows)
+            store['watermark'] = max(store['watermark'], new_rows['date'].max())
+        store['folded'].append(yesterday_hash)
+        save_store(store)
+    return store
@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import DATASET_FILES, FX_RATES_PATH, CURRENCY_CODES_PATH
+from data_io import resolve_data_path
+
+# Headless capacity test for the dashboard. Each simulated session drives app.py through Streamlit's
+# AppTest (the same script runner the server uses) with a page load followed by filter changes,
+# Apply Filters (which also builds the CSV download) and the unique-attempts toggle. Each session runs
+# in its own process (AppTest is not thread-safe), so the summed peak RSS of the sessions is an upper
+# bound for one server holding them all. A session that fails is recorded with its error and the run
+# goes on. Every dataset size is run in its own subprocess so memory is measured per size. One warm
+# page load is also recorded to report how many messages, and how many bytes, a rerun sends to the browser.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+# Function to write a copy of the datasets into a work directory with the inception history scaled up.
+# Each extra copy of the inception file is shifted back by the span of the original data, so copies
+# add history instead of looking like retries of the same transactions.
+def prepare_workdir(workdir, scale):
+    for dataset_name, file_name in DATASET_FILES.items():
+        source = resolve_data_path(file_name)
+        target = os.path.join(workdir, os.path.basename(source))
+        if dataset_name != 'transaction_inception' or scale == 1:
+            shutil.copy(source, target)
+            continue
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        span = (dates.max() - dates.min()).ceil('D') + pd.Timedelta(days=1)
+        copies = []
+        for copy in range(scale):
+            shifted = (dates - span * copy).dt.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-3]
+            copies.append(df.assign(date=shifted.where(dates.notna(), df['date'])))
+        pd.concat(copies, ignore_index=True).to_csv(os.path.join(workdir, os.path.basename(file_name)), index=False)
+    for lookup_path in [FX_RATES_PATH, CURRENCY_CODES_PATH]:
+        shutil.copy(lookup_path, os.path.join(workdir, os.path.basename(lookup_path)))
+    return len(pd.read_csv(os.path.join(workdir, os.path.basename(DATASET_FILES['transaction_inception'])), usecols=['date']))
+
+# Function to time one rerun of a session, failing the session if the script raised
+def timed_run(at, timings, action, timeout):
+    start = time.perf_counter()
+    at.run(timeout=timeout)
+    timings.append((action, time.perf_counter() - start))
+    if at.exception:
+        raise RuntimeError(f"{action}: {at.exception[0].value}")
+    return at
+
+# Function to select a random option of a multi-select filter in place of the current selection
+def pick_option(at, label, rng):
+    for multiselect in at.multiselect:
+        if multiselect.label == label:
+            if multiselect.options:
+                multiselect.set_value([rng.choice(multiselect.options)])
+            return
+
+# Function to get the peak RSS of the current process in MB (ru_maxrss is reported in kilobytes on Linux)
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Function to simulate one viewer session: page load, then a series of realistic interactions.
+# Returns the timings, the session's peak RSS and the error that ended it (None if it completed).
+def run_session(session_id, interactions, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    timings = []
+    try:
+        at = timed_run(AppTest.from_file(APP_PATH, default_timeout=timeout), timings, 'page_load', timeout)
+        for _ in range(interactions):
+            action = rng.choice(['filter', 'filter', 'download', 'unique_toggle'])
+            if action == 'filter':
+                pick_option(at, rng.choice(["Transaction Type", "Currency", "Transaction Status"]), rng)
+            elif action == 'download':
+                pick_option(at, "Transaction Type", rng)
+                next(button for button in at.button if button.label == "Apply Filters").click()
+            else:
+                at.checkbox[0].set_value(not at.checkbox[0].value)
+            timed_run(at, timings, action, timeout)
+    except Exception as error:
+        return timings, peak_rss_mb(), f"session {session_id}: {type(error).__name__}: {error}"
+    return timings, peak_rss_mb(), None
+
+# Function to count the forward messages (mostly element deltas) and their serialized bytes that one
+# warm page load sends to the browser
+def measure_page_messages(timeout):
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    sent = []
+    run_script = LocalScriptRunner.run
+    def recording_run(runner, *args, **kwargs):
+        tree = run_script(runner, *args, **kwargs)
+        sent.append(list(runner.forward_msgs()))
+        return tree
+    LocalScriptRunner.run = recording_run
+    try:
+        AppTest.from_file(APP_PATH, default_timeout=timeout).run(timeout=timeout)
+    finally:
+        LocalScriptRunner.run = run_script
+    return len(sent[-1]), sum(message.ByteSize() for message in sent[-1])
+
+# Function to run N concurrent sessions against the datasets in the current directory
+def run_load_test(sessions, interactions, timeout=300):
+    # The first load builds the derived artifacts; time it separately from the concurrent runs
+    cold_timings, _, cold_error = run_session(-1, 0, timeout)
+    if cold_error:
+        raise RuntimeError(cold_error)
+    page_messages, page_message_bytes = measure_page_messages(timeout)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=sessions, mp_context=multiprocessing.get_context('spawn')) as executor:
+        results = list(executor.map(run_session, range(sessions), [interactions] * sessions, [timeout] * sessions))
+    elapsed = time.perf_counter() - start
+
+    errors = [error for _, _, error in results if error]
+    latencies = pd.DataFrame([timing for timings, _, _ in results for timing in timings], columns=['action', 'seconds'])
+    by_action = latencies.groupby('action')['seconds'].describe(percentiles=[0.5, 0.95])[['count', '50%', '95%']]
+    return {
+        'sessions': sessions,
+        'failed_sessions': len(errors),
+        'errors': errors,
+        'reruns': len(latencies),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_reruns_per_s': round(len(latencies) / elapsed, 2),
+        'cold_load_s': round(cold_timings[0][1], 2),
+        'page_messages': page_messages,
+        'page_message_kb': round(page_message_bytes / 1024, 1),
+        'p50_s': round(float(np.percentile(latencies['seconds'], 50)), 3) if len(latencies) else None,
+        'p95_s': round(float(np.percentile(latencies['seconds'], 95)), 3) if len(latencies) else None,
+        'by_action': {action: {'count': int(row['count']), 'p50_s': round(row['50%'], 3), 'p95_s': round(row['95%'], 3)} for action, row in by_action.iterrows()},
+        'peak_rss_mb': round(peak_rss_mb() + sum(session_rss for _, session_rss, _ in results), 1),
+    }
+
+# Function to run the load test for one dataset size in a fresh process, so peak RSS is not shared
+def run_scale(scale, sessions, interactions, timeout):
+    with tempfile.TemporaryDirectory(prefix=f"load_test_x{scale}_") as workdir:
+        rows = prepare_workdir(workdir, scale)
+        worker = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', workdir,
+             '--sessions', str(sessions), '--interactions', str(interactions), '--timeout', str(timeout)],
+            capture_output=True, text=True,
+        )
+        if worker.returncode != 0:
+            raise RuntimeError(worker.stderr.strip().splitlines()[-1] if worker.stderr.strip() else f"worker exited with {worker.returncode}")
+        return {'scale': scale, 'inception_rows': rows, **json.loads(worker.stdout.strip().splitlines()[-1])}
+
+# Measure capacity from the command line, e.g. python load_test.py --sessions 1 4 8 --scales 1 10
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions and report rerun latency, throughput and peak RSS")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1], help="multiples of the inception dataset to test with")
+    parser.add_argument('--interactions', type=int, default=5, help="interactions per session after the page load")
+    parser.add_argument('--timeout', type=float, default=300, help="seconds a single rerun may take")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(APP_PATH))
+        os.chdir(args.worker)
+        # Run through the imported module: AppTest replaces __main__, so session functions must pickle by module name
+        import load_test
+        print(json.dumps(load_test.run_load_test(args.sessions[0], args.interactions, args.timeout)))
+        sys.exit(0)
+
+    results = []
+    for scale in args.scales:
+        for sessions in args.sessions:
+            result = run_scale(scale, sessions, args.interactions, args.timeout)
+            results.append(result)
+            print(
+                f"x{scale} ({result['inception_rows']} rows) {sessions} sessions: {result['throughput_reruns_per_s']} reruns/s, "
+                f"p50 {result['p50_s']}s, p95 {result['p95_s']}s, cold load {result['cold_load_s']}s, peak RSS {result['peak_rss_mb']} MB, "
+                f"{result['page_messages']} messages ({result['page_message_kb']} KB) per page load"
+            )
+            for error in result['errors']:
+                print(f"  failed {error}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
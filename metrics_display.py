@@ -1,11 +1,40 @@
 import pandas as pd
 import streamlit as st
-import os
-from datetime import datetime
-
-# Function to read CSV files
-def read_csv_file(file_path):
-    return pd.read_csv(file_path)
+from config import DATA_MODE
+from data_io import read_csv, STATUS_COUNT_COLUMN_TYPES, STATUS_CHANGE_COLUMN_TYPES
+from dataset_manifest import get_dataset_path, get_dataset_entry, get_file_creation_date, record_schema
+from onboarding_funnel import funnel_stages, load_funnel_store, update_funnel_store, display_onboarding_funnel
+from tile_grid import tile_grid_styles, tile, render_tile_grid
+from status_history import update_status_history, load_status_history, counts_as_of, display_status_growth
+
+# Color class mapping for current cardholder stats
+color_class_map_cardholder = {
+    'ACTIVE': '#669966',
+    'INACTIVE': 'rgb(199 65 56)',
+    'PENDINGID VERIFICATION': '#6699cc',
+    'Suspended': '#cc9933',
+    'TERMINATED': 'rgb(67 178 173)',
+    'PENDING KYC': '#27408b',
+    'Total': 'rgb(53 141 114)',
+    'Activated': '#669966',
+    'Inactive': 'rgb(199 65 56)',
+    'Pending IDV': '#6699cc',
+    'Pending KYC': '#4692A4',
+    'Terminated': 'rgb(67 178 173)',
+    'Created': '#2199D4',
+}
+
+# Define the desired order of statuses
+ordered_statuses = ['Created','Pending KYC', 'Pending IDV', 'Inactive', 'Activated', 'Suspended', 'Terminated']
+
+# Define the desired order of card statuses
+card_ordered_statuses = ['Created', 'Inactive', 'Activated', 'Suspended', 'Terminated']
+
+# Function to read the active CSV file (plain, .gz or .zst) of a dataset
+def read_csv_file(dataset_name, column_types=None):
+    df = read_csv(get_dataset_path(dataset_name), column_types)
+    record_schema(dataset_name, df)
+    return df
 
 # Function to log messages to the browser console
 def display_to_browser_console(message):
@@ -16,66 +45,99 @@ def display_to_browser_console(message):
     """
     st.components.v1.html(js_code, height=0)
 
-# Function to get the creation date of a file
-def get_file_creation_date(file_path):
-    creation_time = os.path.getctime(file_path)  # Get the file creation time
-    return datetime.fromtimestamp(creation_time).strftime('%Y-%m-%d %H:%M:%S')
+# Function to build a row of status count boxes followed by a total box
+def status_tiles(counts, statuses, total_label, default_color, format_status=str):
+    tiles = [tile(format_status(status), counts.get(status, 0), background=color_class_map_cardholder.get(status, default_color)) for status in statuses]
+    tiles.append(tile(total_label, sum(counts.values()), background=color_class_map_cardholder['Total']))
+    return tiles
+
+# Function to read a status count export into {status: count}
+def status_snapshot_counts(df):
+    return {
+        row["status"]: row["count"]
+        for index, row in df.iterrows()
+    }
+
+# Function to count yesterday's status changes per status (the new state, or the operation when there is none).
+# Event-level exports carry one row per status change instead of a count.
+def yesterday_status_counts(df, statuses):
+    if 'count' not in df.columns:
+        df = df.assign(count=1)
+    counts = df.groupby(df['newstate'].fillna(df['operation']))['count'].sum()
+    return {status: int(counts.get(status, 0)) for status in statuses}
+
+# Function to fold a day's status counts and yesterday changes into the status history.
+# An export describes the day before it was created.
+def record_status_history(kind, snapshot_counts, transition_counts):
+    snapshot_path, snapshot_entry = get_dataset_entry(f"{kind}_inception")
+    transitions_path, transitions_entry = get_dataset_entry(f"{kind}_yesterday")
+    return update_status_history(
+        kind,
+        snapshot_counts, snapshot_entry['sha256'], pd.Timestamp(snapshot_entry['created']).normalize() - pd.Timedelta(days=1),
+        transition_counts, transitions_entry['sha256'], pd.Timestamp(transitions_entry['created']).normalize() - pd.Timedelta(days=1),
+    )
+
+# Function to fold the current card and cardholder exports into the status histories. Run by the
+# precompute step after every drop, so each day's snapshot is kept even if nobody opens the dashboard.
+def record_status_histories():
+    for kind, statuses in [('cardholder', ordered_statuses), ('card', card_ordered_statuses)]:
+        snapshot_counts = status_snapshot_counts(read_csv_file(f"{kind}_inception", STATUS_COUNT_COLUMN_TYPES))
+        transition_counts = yesterday_status_counts(read_csv_file(f"{kind}_yesterday", STATUS_CHANGE_COLUMN_TYPES), statuses)
+        record_status_history(kind, snapshot_counts, transition_counts)
+
+# Function to fold the cardholder yesterday file into the onboarding funnel store.
+# Run by the precompute step after every drop; the export describes the day before it was created.
+def record_onboarding_funnel(df_yesterday_cardholder=None):
+    if df_yesterday_cardholder is None:
+        df_yesterday_cardholder = read_csv_file('cardholder_yesterday', STATUS_CHANGE_COLUMN_TYPES)
+    entry = get_dataset_entry('cardholder_yesterday')[1]
+    day = pd.Timestamp(entry['created']).normalize() - pd.Timedelta(days=1)
+    return update_funnel_store(df_yesterday_cardholder, entry['sha256'], day, funnel_stages(ordered_statuses))
+
+# Function to get a status history for display: kept up to date in live mode, read as stored in artifacts mode
+def current_status_history(kind, snapshot_counts, transition_counts):
+    if DATA_MODE == 'artifacts':
+        return load_status_history(kind)
+    return record_status_history(kind, snapshot_counts, transition_counts)
+
+# Function to display the cardholder and card status counts as of a past day, from the status histories
+def display_status_counts_as_of(as_of):
+    for kind, title, statuses, total_label, default_color in [
+        ('cardholder', "Cardholder", ordered_statuses, "Total", '#4d4d4d'),
+        ('card', "Card", card_ordered_statuses, "Total Cards", '#99CC99'),
+    ]:
+        st.write(f"#### {title} Status as of {as_of}")
+        counts = counts_as_of(load_status_history(kind), as_of)
+        if counts is None:
+            st.write(f"No {title.lower()} status history before {as_of}.")
+            continue
+        render_tile_grid([status_tiles(counts, statuses, total_label, default_color)], key=f"{kind}_as_of")
 
 # Function to display metrics for cardholders and cards
 def display_metrics():
     # Reading data from the files
-    df_cardholder = read_csv_file('./cardholder_inception.csv')
-    df_yesterday_cardholder = read_csv_file('./cardholder_yesterday.csv')
-    df_card = read_csv_file('./card_inception.csv')
-    df_yesterday_card = read_csv_file('./card_yesterday.csv')
+    df_cardholder = read_csv_file('cardholder_inception', STATUS_COUNT_COLUMN_TYPES)
+    df_yesterday_cardholder = read_csv_file('cardholder_yesterday', STATUS_CHANGE_COLUMN_TYPES)
+    df_card = read_csv_file('card_inception', STATUS_COUNT_COLUMN_TYPES)
+    df_yesterday_card = read_csv_file('card_yesterday', STATUS_CHANGE_COLUMN_TYPES)
 
-    # Get file creation dates
-    cardholder_inception_date = get_file_creation_date('./cardholder_inception.csv')
-    cardholder_yesterday_date = get_file_creation_date('./cardholder_yesterday.csv')
-    card_inception_date = get_file_creation_date('./card_inception.csv')
-    card_yesterday_date = get_file_creation_date('./card_yesterday.csv')
+    # Get file creation dates from the manifest
+    cardholder_inception_date = get_file_creation_date('cardholder_inception')
+    cardholder_yesterday_date = get_file_creation_date('cardholder_yesterday')
+    card_inception_date = get_file_creation_date('card_inception')
+    card_yesterday_date = get_file_creation_date('card_yesterday')
 
     ### Cardholder Metrics ###
-    status_counts_cardholder = {
-        row["status"]: row["count"]
-        for index, row in df_cardholder.iterrows()
-    }
-
-    total_cardholder_count = sum(status_counts_cardholder.values())
-
-    # Color class mapping for current cardholder stats
-    color_class_map_cardholder = {
-        'ACTIVE': '#669966',
-        'INACTIVE': 'rgb(199 65 56)',
-        'PENDINGID VERIFICATION': '#6699cc',
-        'Suspended': '#cc9933',
-        'TERMINATED': 'rgb(67 178 173)',
-        'PENDING KYC': '#27408b',
-        'Total': 'rgb(53 141 114)',
-        'Activated': '#669966',
-        'Inactive': 'rgb(199 65 56)',
-        'Pending IDV': '#6699cc',
-        'Pending KYC': '#4692A4',
-        'Terminated': 'rgb(67 178 173)',
-        'Created': '#2199D4',
-    }
-
-    # Define the desired order of statuses
-    ordered_statuses = ['Created','Pending KYC', 'Pending IDV', 'Inactive', 'Activated', 'Suspended', 'Terminated']
+    status_counts_cardholder = status_snapshot_counts(df_cardholder)
 
-    # Yesterday's data initialization
-    count_dict = {status: 0 for status in ordered_statuses}
-
-    # Iterate through yesterday's data
-    for index, row in df_yesterday_cardholder.iterrows():
-        operation_newstate = row["newstate"] if pd.notna(row["newstate"]) else row["operation"]
-        if operation_newstate in count_dict:
-            count_dict[operation_newstate] += row["count"]
+    # Yesterday's status changes per status
+    count_dict = yesterday_status_counts(df_yesterday_cardholder, ordered_statuses)
 
     # Log yesterday's counts in the console
     display_to_browser_console(f"'Yesterday Cardholder Counts: {count_dict}'")
 
     # Streamlit layout for cardholder metrics
+    tile_grid_styles()
     st.subheader("Cardholder Onboarding Summary")
     st.markdown("<hr>", unsafe_allow_html=True)
 
@@ -85,47 +147,30 @@ def display_metrics():
     # Display last update date for cardholder data
     st.write(f"**Data Updated On:** {cardholder_inception_date}")
 
-    cols_cardholder = st.columns(len(ordered_statuses) + 1)  # +1 for total
-
-    # Display cardholder stats
-    for i, status in enumerate(ordered_statuses):
-        count = status_counts_cardholder.get(status, 0)
-        with cols_cardholder[i]:
-            st.markdown(f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder.get(status, '#4d4d4d')}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                        f"<h6>{status}</h6><h3>{count}</h3></div>", unsafe_allow_html=True)
-
-    # Display total cardholders
-    with cols_cardholder[-1]:
-        st.markdown(f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder['Total']}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                    f"<h5>Total</h6><h3>{total_cardholder_count}</h6></div>", unsafe_allow_html=True)
+    # Display cardholder stats and the total as one row of tiles
+    render_tile_grid([status_tiles(status_counts_cardholder, ordered_statuses, "Total", '#4d4d4d')], key="cardholder_overall")
 
     # Display yesterday's status
     st.write("### Yesterday's Status")
     # Display last update date for cardholder yesterday data
     st.write(f"**Data Updated On:** {cardholder_yesterday_date}")
-    cols_yesterday_cardholder = st.columns(len(ordered_statuses) + 1)
+    render_tile_grid([status_tiles(count_dict, ordered_statuses, "Total", '#4d4d4d')], key="cardholder_yesterday")
 
-    for i, status in enumerate(ordered_statuses):
-        count = count_dict.get(status, 0)
-        with cols_yesterday_cardholder[i]:
-            st.markdown(f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder.get(status, '#4d4d4d')}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                        f"<h6>{status}</h6><h3>{count}</h3></div>", unsafe_allow_html=True)
+    # Keep the day's counts and changes in the status history and chart its growth
+    cardholder_history = current_status_history('cardholder', status_counts_cardholder, count_dict)
+    display_status_growth(cardholder_history, "Cardholder", ordered_statuses, color_class_map_cardholder, key_suffix="cardholder")
 
-    total_yesterday_cardholder_count = sum(count_dict.values())
-    with cols_yesterday_cardholder[-1]:
-        st.markdown(f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder['Total']}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                    f"<h6>Total</h6><h3>{total_yesterday_cardholder_count}</h3></div>", unsafe_allow_html=True)
+    # Onboarding funnel, folding in yesterday's status changes once per file and day
+    if DATA_MODE == 'artifacts':
+        funnel_store = load_funnel_store(funnel_stages(ordered_statuses))
+    else:
+        funnel_store = record_onboarding_funnel(df_yesterday_cardholder)
+    display_onboarding_funnel(funnel_store, color_class_map_cardholder)
 
     ### Card Metrics ###
 
-    # Define the desired order of card statuses
-    card_ordered_statuses = ['Created', 'Inactive', 'Activated', 'Suspended', 'Terminated']
-
     # Read card data and create a dictionary of status counts for overall metrics
-    status_counts_card = {
-        row["status"]: row["count"]
-        for index, row in df_card.iterrows()
-    }
+    status_counts_card = status_snapshot_counts(df_card)
     total_card_count = sum(status_counts_card.values())
 
     # Log card metrics in the console
@@ -138,34 +183,11 @@ def display_metrics():
     st.write("### Overall Status")
     # Display last update date for card data
     st.write(f"**Data Updated On:** {card_inception_date}")
-    cols_card = st.columns(len(card_ordered_statuses) + 1)  # +1 for total
-
-    # Display card stats in the specified order
-    for i, status in enumerate(card_ordered_statuses):
-        count = status_counts_card.get(status, 0)
-        with cols_card[i]:
-            st.markdown(
-                f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder.get(status, '#99CC99')}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                f"<h5>{status.capitalize()}</h5><h3>{count}</h3></div>",
-                unsafe_allow_html=True,
-            )
-
-    # Display total cards
-    with cols_card[-1]:
-        st.markdown(
-            f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder['Total']}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-            f"<h5>Total Cards</h5><h3>{total_card_count}</h3></div>",
-            unsafe_allow_html=True,
-        )
-
-    # Yesterday's card metrics initialization
-    count_dict_yesterday_card = {status: 0 for status in card_ordered_statuses}
-
-    # Iterate through yesterday's data for cards
-    for index, row in df_yesterday_card.iterrows():
-        operation_newstate = row["newstate"] if pd.notna(row["newstate"]) else row["operation"]
-        if operation_newstate in count_dict_yesterday_card:
-            count_dict_yesterday_card[operation_newstate] += row["count"]
+    # Display card stats in the specified order, with the total cards
+    render_tile_grid([status_tiles(status_counts_card, card_ordered_statuses, "Total Cards", '#99CC99', str.capitalize)], key="card_overall")
+
+    # Yesterday's card status changes per status
+    count_dict_yesterday_card = yesterday_status_counts(df_yesterday_card, card_ordered_statuses)
 
     # Log yesterday's card counts in the console
     display_to_browser_console(f"'Yesterday Card Counts: {count_dict_yesterday_card}'")
@@ -174,23 +196,13 @@ def display_metrics():
     st.write("### Yesterday's Status")
     # Display last update date for card yesterday data
     st.write(f"**Data Updated On:** {cardholder_yesterday_date}")
-    cols_yesterday_card = st.columns(len(card_ordered_statuses) + 1)
-
-    for i, status in enumerate(card_ordered_statuses):
-        count = count_dict_yesterday_card.get(status, 0)
-        with cols_yesterday_card[i]:
-            st.markdown(
-                f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder.get(status, '#99CC99')}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-                f"<h5>{status.capitalize()}</h5><h3>{count}</h3></div>",
-                unsafe_allow_html=True,
-            )
-
-    total_yesterday_card_count = sum(count_dict_yesterday_card.values())
-    with cols_yesterday_card[-1]:
-        st.markdown(
-            f"<div style='height: 120px; padding: 20px; background-color: {color_class_map_cardholder['Total']}; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);'>"
-            f"<h5>Total Cards</h5><h3>{total_yesterday_card_count}</h3></div>",
-            unsafe_allow_html=True,
-        )
+    render_tile_grid([status_tiles(count_dict_yesterday_card, card_ordered_statuses, "Total Cards", '#99CC99', str.capitalize)], key="card_yesterday")
+
+    # Card portfolio growth, reconstructed from the delta-encoded status history
+    card_history = current_status_history('card', status_counts_card, count_dict_yesterday_card)
+    display_status_growth(card_history, "Card", card_ordered_statuses, color_class_map_cardholder, key_suffix="card")
     st.markdown("<br>", unsafe_allow_html=True)
-display_metrics()
+
+# Run the metrics display on its own; app.py calls display_metrics() itself
+if __name__ == "__main__":
+    display_metrics()
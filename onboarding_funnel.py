@@ -0,0 +1,183 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+from config import ONBOARDING_FUNNEL_PATH
+from data_io import atomic_replace
+
+# Statuses that leave the onboarding path; every other status is a funnel stage, in display order
+FUNNEL_EXIT_STATUSES = ['Inactive', 'Suspended', 'Terminated']
+
+# Time from Created to reaching a stage, bucketed in hours
+TRANSITION_BINS_HOURS = [0, 1, 6, 24, 72, 168, 336, 720, np.inf]
+TRANSITION_BIN_LABELS = ['<1h', '1-6h', '6-24h', '1-3d', '3-7d', '7-14d', '14-30d', '30d+']
+
+# The funnel store is updated incrementally: each cardholder yesterday file is folded in once per day,
+# keyed by (day, content hash), so a render never replays history and identical content exported on
+# another day still counts for that day. Event-level exports (cardholder_id, timestamp per status change)
+# build real cohorts by creation day, with the stages each cohort reached and transition-time histograms.
+# The daily count exports only say how many status changes of each kind happened that day, so they are
+# kept as a daily stage mix rather than as cohorts.
+
+# Function to get the funnel stages from the cardholder status order
+def funnel_stages(ordered_statuses):
+    return [status for status in ordered_statuses if status not in FUNNEL_EXIT_STATUSES]
+
+# Function to create an empty funnel store
+def create_funnel_store(stages):
+    return {
+        'stages': stages,
+        'folded': [],
+        'cohorts': {},
+        'daily_counts': {},
+        'cardholders': pd.DataFrame({
+            'cohort': pd.Series(dtype='datetime64[ns]'),
+            'created': pd.Series(dtype='datetime64[ns]'),
+            'reached': pd.Series(dtype=np.int64),
+        }),
+        'transition_counts': {stage: np.zeros(len(TRANSITION_BIN_LABELS), dtype=np.int64) for stage in stages[1:]},
+    }
+
+# Function to load the funnel store, starting over if the stages changed
+def load_funnel_store(stages, path=ONBOARDING_FUNNEL_PATH):
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            store = pickle.load(f)
+        if store['stages'] == stages:
+            return store
+    return create_funnel_store(stages)
+
+# Function to save the funnel store atomically
+def save_funnel_store(store, path=ONBOARDING_FUNNEL_PATH):
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(store, f)
+
+# Function to get a cohort's stage counts, creating them on first use
+def cohort_counts(store, cohort_day):
+    return store['cohorts'].setdefault(cohort_day, dict.fromkeys(store['stages'], 0))
+
+# Function to record a day's aggregated status-change counts per stage
+def fold_status_counts(store, df, day):
+    counts = df.groupby(df['newstate'].fillna(df['operation']))['count'].sum()
+    store['daily_counts'][day] = {stage: int(counts.get(stage, 0)) for stage in store['stages']}
+
+# Function to fold status-change events into the cohorts of the cardholders they belong to.
+# A cardholder's cohort is the day it was first seen; reaching a stage also counts the earlier stages it
+# skipped, so the funnel never widens. Events at or below a stage already reached are ignored, and the
+# time from Created is recorded for each stage reached (when the Created event was seen).
+def fold_events(store, df):
+    stages = store['stages']
+    events = df.assign(state=df['newstate'].fillna(df['operation']), timestamp=pd.to_datetime(df['timestamp'], errors='coerce'))
+    events = events[events['state'].isin(stages) & events['timestamp'].notna()].sort_values('timestamp', kind='stable')
+    if events.empty:
+        return
+    events = events.assign(stage=events['state'].map({stage: position for position, stage in enumerate(stages)}).astype(np.int64))
+    cardholder_ids = events['cardholder_id']
+
+    # Cardholders first seen past Created were created before the store started; their start time is unknown
+    first = events.groupby('cardholder_id', sort=False).first()
+    first = first[~first.index.isin(store['cardholders'].index)]
+    new_cardholders = pd.DataFrame({
+        'cohort': first['timestamp'].dt.normalize(),
+        'created': first['timestamp'].where(first['stage'] == 0),
+        'reached': 0,
+    })
+    cardholders = pd.concat([store['cardholders'], new_cardholders]) if len(store['cardholders']) else new_cardholders
+
+    # The stage reached before each event: stored, or advanced by an earlier event of the same file
+    earlier = (events['stage'] + 1).groupby(cardholder_ids).cummax().groupby(cardholder_ids).shift(fill_value=0)
+    reached_before = np.maximum(cardholder_ids.map(cardholders['reached']), earlier)
+    advancing = events[events['stage'] >= reached_before]
+
+    # Time from Created to each stage reached
+    created = advancing['cardholder_id'].map(cardholders['created'])
+    timed = (advancing['stage'] > 0) & created.notna()
+    hours = (advancing['timestamp'][timed] - created[timed]).dt.total_seconds() / 3600
+    bins = np.searchsorted(TRANSITION_BINS_HOURS, hours.to_numpy(), side='right') - 1
+    for state, state_bins in pd.Series(bins, index=hours.index).groupby(advancing['state'][timed]):
+        np.add.at(store['transition_counts'][state], state_bins.to_numpy(), 1)
+
+    # Each stage between the previously and the newly reached one is counted once for the cardholder's cohort
+    reached_after = np.maximum(cardholders['reached'], (events['stage'] + 1).groupby(cardholder_ids).max().reindex(cardholders.index, fill_value=0))
+    for position, stage in enumerate(stages):
+        passed = (cardholders['reached'] <= position) & (position < reached_after)
+        for cohort_day, count in cardholders.loc[passed, 'cohort'].value_counts().items():
+            cohort_counts(store, cohort_day)[stage] += int(count)
+    cardholders['reached'] = reached_after.astype(np.int64)
+    store['cardholders'] = cardholders
+
+# Function to keep the funnel store up to date with the cardholder yesterday file of a day
+def update_funnel_store(df, file_hash, day, stages, path=ONBOARDING_FUNNEL_PATH):
+    store = load_funnel_store(stages, path)
+    if (day, file_hash) in store['folded']:
+        return store
+    if {'cardholder_id', 'timestamp'}.issubset(df.columns):
+        fold_events(store, df)
+    else:
+        fold_status_counts(store, df, day)
+    store['folded'].append((day, file_hash))
+    save_funnel_store(store, path)
+    return store
+
+# Function to calculate per-cohort stage counts and conversion from the first stage
+def calculate_funnel(store):
+    stages = store['stages']
+    funnel = pd.DataFrame.from_dict(store['cohorts'], orient='index', columns=stages).sort_index()
+    funnel.index.name = 'cohort'
+    started = funnel[stages[0]].where(funnel[stages[0]] > 0)
+    for stage in stages[1:]:
+        funnel[f"{stage} %"] = (funnel[stage] / started * 100).round(2)
+    return funnel.reset_index()
+
+# Function to calculate the daily stage mix: status changes per stage and each stage's share of the day
+def calculate_daily_mix(store):
+    stages = store['stages']
+    mix = pd.DataFrame.from_dict(store['daily_counts'], orient='index', columns=stages).sort_index()
+    mix.index.name = 'day'
+    day_totals = mix[stages].sum(axis=1).where(lambda totals: totals > 0)
+    for stage in stages:
+        mix[f"{stage} %"] = (mix[stage] / day_totals * 100).round(2)
+    return mix.reset_index()
+
+# Function to display the onboarding funnel and cohort conversion (event-level exports) or the daily
+# stage mix (count exports), with the time-to-stage histograms
+def display_onboarding_funnel(store, color_map):
+    stages = store['stages']
+    st.write("### Onboarding Funnel")
+    if not store['cohorts'] and not store['daily_counts']:
+        st.write("No onboarding data yet.")
+        return
+
+    if store['cohorts']:
+        funnel = calculate_funnel(store)
+        totals = funnel[stages].sum()
+        fig = go.Figure(go.Funnel(y=stages, x=totals.values, textinfo="value+percent initial", marker={'color': [color_map.get(stage, '#4d4d4d') for stage in stages]}))
+        fig.update_layout(title="Cardholder Onboarding Funnel (all cohorts)")
+        st.plotly_chart(fig, key="onboarding_funnel_chart")
+
+        st.write("#### Conversion by Cohort")
+        st.dataframe(funnel, hide_index=True)
+
+    if store['daily_counts']:
+        mix = calculate_daily_mix(store)
+        st.write("#### Daily Stage Mix")
+        st.caption("Status changes per onboarding stage on each export day. These are daily counts, not cohorts.")
+        fig = go.Figure()
+        for stage in stages:
+            fig.add_trace(go.Bar(x=mix['day'], y=mix[stage], name=stage, marker_color=color_map.get(stage)))
+        fig.update_layout(title="Onboarding Status Changes by Day", barmode='stack')
+        st.plotly_chart(fig, key="onboarding_daily_mix_chart")
+        st.dataframe(mix, hide_index=True)
+
+    st.write("#### Time to Reach Stage")
+    if not any(counts.sum() for counts in store['transition_counts'].values()):
+        st.write("Transition times need event-level exports with cardholder_id and timestamp columns.")
+        return
+    fig = go.Figure()
+    for stage, counts in store['transition_counts'].items():
+        fig.add_trace(go.Bar(x=TRANSITION_BIN_LABELS, y=counts, name=stage, marker_color=color_map.get(stage)))
+    fig.update_layout(title="Time from Created", barmode='group')
+    st.plotly_chart(fig, key="onboarding_transition_chart")
@@ -0,0 +1,51 @@
+import math
+import pandas as pd
+import streamlit as st
+from config import TABLE_PAGE_SIZE
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Large tables stay on the server: search and sorting run against the full frame here and only the
+# visible page is handed to st.dataframe, so the browser never receives the whole result.
+
+# Function to keep the rows where any text column contains the search term (case-insensitive)
+def search_rows(df, search):
+    if not search:
+        return df
+    mask = pd.Series(False, index=df.index)
+    for column in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            mask |= df[column].astype('string').str.contains(search, case=False, regex=False).fillna(False)
+    return df[mask]
+
+# Function to search, sort and slice a table, returning the page with the matching row count
+def get_table_page(df, search="", sort_by=None, ascending=True, page=1, page_size=TABLE_PAGE_SIZE):
+    matches = search_rows(df, search)
+    if sort_by is not None:
+        matches = matches.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+    start = (page - 1) * page_size
+    return matches.iloc[start:start + page_size], len(matches)
+
+# Function to display a table one page at a time with server-side search and sorting
+def display_paginated_table(df, key_suffix, default_sort=None, default_ascending=False):
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input("Search", key=f"table_search_{key_suffix}")
+    with col2:
+        columns = list(df.columns)
+        sort_by = st.selectbox("Sort By", options=columns, index=columns.index(default_sort) if default_sort in columns else 0, key=f"table_sort_{key_suffix}")
+    with col3:
+        ascending = st.selectbox("Order", options=[False, True], index=int(default_ascending), format_func=lambda value: "Ascending" if value else "Descending", key=f"table_order_{key_suffix}")
+    with col4:
+        page_size = st.selectbox("Rows", options=PAGE_SIZES, index=PAGE_SIZES.index(TABLE_PAGE_SIZE) if TABLE_PAGE_SIZE in PAGE_SIZES else 0, key=f"table_page_size_{key_suffix}")
+
+    matches = search_rows(df, search)
+    page_count = max(1, math.ceil(len(matches) / page_size))
+    page_key = f"table_page_{key_suffix}"
+    if st.session_state.get(page_key, 1) > page_count:
+        # A narrower search or larger page size can leave the selected page past the end
+        st.session_state[page_key] = page_count
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key=page_key)
+    page_df, match_count = get_table_page(matches, sort_by=sort_by, ascending=ascending, page=page, page_size=page_size)
+    st.dataframe(page_df, hide_index=True)
+    st.caption(f"{match_count} of {len(df)} rows")
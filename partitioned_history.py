@@ -0,0 +1,72 @@
+import os
+import glob
+import json
+import pandas as pd
+from config import TRANSACTION_HISTORY_DIR
+from data_io import atomic_replace
+from shared_frames import write_shared_frame, read_shared_frame
+
+# The normalized transactions are kept as a history partitioned by calendar day: one shared Arrow
+# file per day (day=YYYY-MM-DD.arrow) plus an index of the days present. A question about one day
+# only opens that day's file, so a historical day costs about as much as the yesterday file.
+# The index is kept up to date as an incremental store (see incremental_store.py), folding under its
+# lock: new rows are added to the partitions they fall in, and a rebuild (new settings or inception content) rewrites
+# every partition, since each holds normalized rows.
+
+INDEX_FILE = '_index.json'
+
+# Function to get the file of a day's partition
+def partition_path(day, history_dir=TRANSACTION_HISTORY_DIR):
+    return os.path.join(history_dir, f"day={pd.Timestamp(day):%Y-%m-%d}.arrow")
+
+# Function to load the history index (None if nothing was stored yet)
+def load_history_index(history_dir=TRANSACTION_HISTORY_DIR):
+    path = os.path.join(history_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        index = json.load(f)
+    index['watermark'] = pd.Timestamp(index['watermark'])
+    return index
+
+# Function to save the history index atomically
+def save_history_index(index, history_dir=TRANSACTION_HISTORY_DIR):
+    path = os.path.join(history_dir, INDEX_FILE)
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, 'w') as f:
+            json.dump({**index, 'watermark': str(index['watermark'])}, f, indent=2)
+
+# Function to write rows into their day partitions. A partition that already exists is rewritten from
+# the rows the index has recorded (up to its watermark) plus the new ones, so a fold that was cut off
+# before the index was saved can be redone without duplicating rows.
+def write_day_partitions(df, index, history_dir=TRANSACTION_HISTORY_DIR):
+    df = df[df['date'].notna()]
+    for day, day_df in df.groupby(df['date'].dt.normalize(), sort=True):
+        day_key = f"{day:%Y-%m-%d}"
+        if day_key in index['days']:
+            stored_df = read_shared_frame(partition_path(day, history_dir))[0]
+            day_df = pd.concat([stored_df[stored_df['date'] <= index['watermark']], day_df])
+        else:
+            index['days'].append(day_key)
+        write_shared_frame(day_df.reset_index(drop=True), partition_path(day, history_dir))
+    index['days'].sort()
+
+# Function to build the history from the inception rows, replacing any partitions written before
+def build_history(inception_df, history_dir=TRANSACTION_HISTORY_DIR):
+    os.makedirs(history_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(history_dir, 'day=*.arrow')):
+        os.remove(path)
+    index = {'days': []}
+    write_day_partitions(inception_df, index, history_dir)
+    return index
+
+# Function to fold later transaction rows into the day partitions
+def fold_history_rows(index, new_rows, history_dir=TRANSACTION_HISTORY_DIR):
+    write_day_partitions(new_rows, index, history_dir)
+
+# Function to read one day's transactions, opening only that day's partition
+def read_day_partition(day, history_dir=TRANSACTION_HISTORY_DIR):
+    path = partition_path(day, history_dir)
+    if not os.path.exists(path):
+        return None
+    return read_shared_frame(path)[0]
@@ -0,0 +1,111 @@
+import json
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+from config import HOME_COUNTRY
+from shared_frames import INDEX_COLUMN
+from country_metrics import DOMESTIC, CROSS_BORDER
+from quantile_sketch import amount_buckets
+
+# Lazy, multi-threaded query engine over the normalized shared frames (NASSWALLET_QUERY_ENGINE=polars).
+# Filters and aggregations run as one Polars query against the memory-mapped Arrow file, so only the
+# columns a query uses are read and filters are applied during the scan. The results are converted
+# to the same frames the pandas engine produces, and the stats are derived from them by the same code.
+
+AGGREGATE_KEYS = ['day', 'currency', 'transaction_type', 'networkname', 'transaction_status']
+SUM_COLUMNS = ['count', 'amount', 'reporting_amount', 'unconverted', 'fee', 'reporting_fee', 'fee_count']
+
+# Function to scan a shared frame lazily, undoing its storage layout (see shared_frames)
+def scan_shared_frame(path):
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        layouts = json.loads(reader.schema.metadata[b'layouts'])
+        first_batch = reader.get_batch(0) if reader.num_record_batches else None
+        categories = {
+            column: first_batch.column(column).dictionary.to_pylist() if first_batch is not None else []
+            for column, layout in layouts.items() if layout['kind'] == 'category'
+        }
+    frame = pl.scan_ipc(path)
+    schema = frame.collect_schema()
+    columns = []
+    for column, layout in layouts.items():
+        if layout['kind'] == 'datetime':
+            columns.append(pl.col(column).cast(pl.Datetime(layout['unit'])))
+        elif schema[column].is_float():
+            # The shared layout keeps NaN as a value; pandas treats it as missing
+            columns.append(pl.col(column).fill_nan(None))
+    return frame.with_columns(columns), categories
+
+# Function to build the filter predicate: multi-select values, date range and acquirer country
+def filter_predicate(selections=None, start_date=None, end_date=None, country=None):
+    predicates = [pl.col(column).is_in(values) for column, values in (selections or {}).items() if values]
+    if start_date:
+        predicates.append(pl.col('date') >= pd.to_datetime(start_date))
+    if end_date:
+        predicates.append(pl.col('date') <= pd.to_datetime(end_date))
+    if country == DOMESTIC:
+        predicates.append(pl.col('ca_country') == HOME_COUNTRY)
+    elif country == CROSS_BORDER:
+        predicates.append(pl.col('ca_country').is_not_null() & (pl.col('ca_country') != HOME_COUNTRY))
+    elif country:
+        predicates.append(pl.col('ca_country') == country)
+    return pl.all_horizontal(predicates) if predicates else None
+
+# Function to scan a shared frame with the filters applied
+def scan_filtered(path, filters=None):
+    frame, categories = scan_shared_frame(path)
+    predicate = filter_predicate(**(filters or {}))
+    return (frame if predicate is None else frame.filter(predicate)), categories
+
+# Function to convert polars aggregates to the frame the pandas engine produces (same dtypes and row order)
+def to_pandas_aggregates(frame, keys, categories):
+    df = frame.sort([pl.col(key).cast(pl.String) if key == 'transaction_status' else pl.col(key) for key in keys], nulls_last=True).to_pandas()
+    df['currency'] = df['currency'].astype('string')
+    for column in ['transaction_type', 'networkname']:
+        df[column] = df[column].astype('str')
+    if 'transaction_status' in df:
+        df['transaction_status'] = pd.Categorical(df['transaction_status'], categories=categories['transaction_status'])
+    df['day'] = df['day'].astype('datetime64[us]')
+    return df
+
+# Function to calculate the transaction aggregates and amount sketches in one lazy query.
+# Returns (aggregates, sketches, retried_count) matching banking_metrics.aggregate_transactions.
+def query_aggregates(path, unique_only=False, filters=None):
+    frame, categories = scan_filtered(path, filters)
+    retried = frame.select(pl.col('is_retry').sum())
+    if unique_only:
+        frame = frame.filter(pl.col('is_final_attempt'))
+
+    fine_aggregates = frame.with_columns(
+        day=pl.col('date').dt.truncate('1d'),
+        # Same bucketing code as the pandas engine, so bucket boundaries match exactly
+        amount_bucket=pl.col('amount').map_batches(lambda amounts: pl.Series(amount_buckets(amounts.to_pandas())), return_dtype=pl.Int64),
+        reporting_fee=pl.col('issuerfee') * pl.col('fx_rate'),
+        has_fee=pl.col('issuerfee').is_not_null(),
+        unconverted=pl.col('reporting_amount').is_null(),
+    ).group_by(AGGREGATE_KEYS + ['amount_bucket']).agg(
+        count=pl.len().cast(pl.Int64),
+        amount=pl.col('amount').sum(),
+        reporting_amount=pl.col('reporting_amount').sum(),
+        unconverted=pl.col('unconverted').sum().cast(pl.Int64),
+        fee=pl.col('issuerfee').sum(),
+        reporting_fee=pl.col('reporting_fee').sum(),
+        fee_count=pl.col('has_fee').sum().cast(pl.Int64),
+    ).with_columns(approved=(pl.col('transaction_status').cast(pl.String) == 'Approved').fill_null(False))
+
+    aggregates = fine_aggregates.group_by(AGGREGATE_KEYS + ['approved']).agg([pl.col(column).sum() for column in SUM_COLUMNS])
+    sketch_keys = ['day', 'currency', 'transaction_type', 'networkname', 'approved', 'amount_bucket']
+    sketches = fine_aggregates.group_by(sketch_keys).agg(pl.col('count').sum())
+
+    retried, aggregates, sketches = pl.collect_all([retried, aggregates, sketches])
+    return (
+        to_pandas_aggregates(aggregates, AGGREGATE_KEYS + ['approved'], categories),
+        to_pandas_aggregates(sketches, sketch_keys, categories),
+        int(retried.item() or 0),
+    )
+
+# Function to get the filtered rows (for the CSV download) from one lazy query
+def query_rows(path, filters=None):
+    frame, categories = scan_filtered(path, filters)
+    df = frame.collect().to_pandas()
+    return df.set_index(INDEX_COLUMN).rename_axis(None) if INDEX_COLUMN in df else df
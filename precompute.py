@@ -0,0 +1,61 @@
+import os
+
+# Precomputing always builds what is missing, whatever mode the dashboard itself runs in
+os.environ['NASSWALLET_DATA_MODE'] = 'live'
+
+import time
+import argparse
+from config import DATASET_FILES, APPROVAL_MONITOR_STATE_PATH
+from dataset_manifest import locked_manifest, refresh_dataset, get_dataset_path, get_dataset_entry
+from approval_monitor import load_monitor_state, update_monitor_from_file, save_monitor_state
+from banking_metrics import (
+    load_transaction_dataset, load_transaction_view, load_transaction_stats, load_filter_index, load_activity_counts,
+    load_daily_aggregates, load_transaction_history,
+)
+from transaction_metrics import load_transaction_summary
+from metrics_display import record_status_histories, record_onboarding_funnel
+
+TRANSACTION_DATASETS = ['transaction_yesterday', 'transaction_inception']
+
+# Run the load -> normalize -> aggregate pipeline once per data drop, writing every artifact the
+# dashboard reads. With NASSWALLET_DATA_MODE=artifacts the dashboard then only reads these artifacts.
+
+# Function to run a precompute step and report how long it took
+def run_step(name, step):
+    start = time.perf_counter()
+    step()
+    print(f"{name}: {time.perf_counter() - start:.2f}s")
+
+# Function to build every dashboard artifact for the active files
+def precompute():
+    with locked_manifest() as manifest:
+        for dataset_name in DATASET_FILES:
+            refresh_dataset(manifest, dataset_name)
+
+    for dataset_name in TRANSACTION_DATASETS:
+        run_step(f"{dataset_name} normalized", lambda: load_transaction_dataset(dataset_name))
+        run_step(f"{dataset_name} filter index", lambda: load_filter_index(dataset_name))
+        run_step(f"{dataset_name} view", lambda: load_transaction_view(dataset_name))
+        for unique_only in (False, True):
+            run_step(f"{dataset_name} stats (unique_only={unique_only})", lambda: load_transaction_stats(dataset_name, unique_only))
+        run_step(f"{dataset_name} summary", lambda: load_transaction_summary(dataset_name))
+    run_step("activity heatmap", load_activity_counts)
+    run_step("daily aggregates", load_daily_aggregates)
+    run_step("transaction history", load_transaction_history)
+
+    def update_approval_monitor():
+        state = update_monitor_from_file(load_monitor_state(get_dataset_path('transaction_yesterday'), APPROVAL_MONITOR_STATE_PATH))
+        save_monitor_state(state, APPROVAL_MONITOR_STATE_PATH)
+    run_step("approval monitor", update_approval_monitor)
+    run_step("status histories", record_status_histories)
+    run_step("onboarding funnel", record_onboarding_funnel)
+
+    for dataset_name in TRANSACTION_DATASETS:
+        entry = get_dataset_entry(dataset_name)[1]
+        print(f"{dataset_name}: sha256={entry['sha256'][:16]} artifacts={sorted(entry['artifacts'])}")
+
+# Precompute from the command line after each data drop
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dashboard's derived artifacts for the active data files")
+    parser.parse_args()
+    precompute()
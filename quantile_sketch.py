@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+
+# Amount distributions are kept as fixed-layout logarithmic bucket sketches (the DDSketch layout):
+# bucket i >= 1 covers (MIN_AMOUNT * GAMMA^(i-2), MIN_AMOUNT * GAMMA^(i-1)], so any quantile read from a sketch is
+# within SKETCH_RELATIVE_ACCURACY of the exact value. Sketches with the same layout merge by adding
+# bucket counts, so per-day sketches answer any date range without touching raw amounts.
+SKETCH_RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+MIN_AMOUNT = 0.01
+MAX_AMOUNT = 1e12
+NUM_BUCKETS = int(np.ceil(np.log(MAX_AMOUNT / MIN_AMOUNT) / np.log(GAMMA))) + 2  # Bucket 0 holds zero amounts
+
+QUANTILES = {'p50': 0.50, 'p95': 0.95, 'p99': 0.99}
+SKETCH_KEYS = ['currency', 'transaction_type', 'networkname']
+
+# Function to map amounts to sketch buckets (-1 for missing amounts)
+def amount_buckets(amounts):
+    values = amounts.to_numpy(dtype=float)
+    buckets = np.full(len(values), -1, dtype=np.int64)
+    positive = values >= MIN_AMOUNT
+    buckets[~positive & ~np.isnan(values)] = 0
+    scaled = np.log(values[positive] / MIN_AMOUNT) / np.log(GAMMA)
+    buckets[positive] = np.clip(np.ceil(scaled).astype(np.int64) + 1, 1, NUM_BUCKETS - 1)
+    return buckets
+
+# Function to get the representative amount of each bucket (the point with the smallest relative error)
+def bucket_values():
+    indices = np.arange(NUM_BUCKETS)
+    values = MIN_AMOUNT * 2 * GAMMA ** (indices - 1) / (GAMMA + 1)
+    values[0] = 0.0
+    return values
+
+# Function to merge sketch rows (amount_bucket, count) into one bucket-count array
+def merge_sketches(sketches):
+    sketches = sketches[sketches['amount_bucket'] >= 0]
+    return np.bincount(sketches['amount_bucket'], weights=sketches['count'], minlength=NUM_BUCKETS)
+
+# Function to read quantiles from a merged sketch
+def sketch_quantiles(counts, quantiles=QUANTILES):
+    total = counts.sum()
+    if total == 0:
+        return {name: np.nan for name in quantiles}
+    cumulative = np.cumsum(counts)
+    values = bucket_values()
+    return {name: values[np.searchsorted(cumulative, np.floor(q * (total - 1)), side='right')] for name, q in quantiles.items()}
+
+# Function to calculate amount quantiles per group over a date range by merging the per-day sketches.
+# Amounts are in their own currency, so sketches are always grouped by currency before merging.
+def calculate_amount_quantiles(sketches, start_date=None, end_date=None, group_by=SKETCH_KEYS):
+    group_by = ['currency'] + [key for key in group_by if key != 'currency']
+    if start_date:
+        sketches = sketches[sketches['day'] >= pd.to_datetime(start_date)]
+    if end_date:
+        sketches = sketches[sketches['day'] <= pd.to_datetime(end_date)]
+    rows = []
+    for group, group_sketches in sketches.groupby(group_by, dropna=False):
+        counts = merge_sketches(group_sketches)
+        group = group if isinstance(group, tuple) else (group,)
+        rows.append({**dict(zip(group_by, group)), 'transactions': int(counts.sum()), **sketch_quantiles(counts)})
+    return pd.DataFrame(rows, columns=group_by + ['transactions'] + list(QUANTILES))
+
+# Function to display amount distribution panels answered from the per-day sketches
+def display_amount_distribution(sketches, label="", key_suffix=""):
+    st.write(f"### {label} Transaction Amount Distribution")
+    days = sketches['day'].dropna()
+    if days.empty:
+        st.write("No transaction amounts.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        group_by = st.multiselect("Group By (besides currency)", options=SKETCH_KEYS[1:], key=f"sketch_group_by_{key_suffix}")
+    with col2:
+        start_date = st.date_input("From Date", value=days.min().date(), key=f"sketch_start_{key_suffix}")
+    with col3:
+        end_date = st.date_input("To Date", value=days.max().date(), key=f"sketch_end_{key_suffix}")
+
+    quantiles = calculate_amount_quantiles(sketches, start_date, end_date, group_by)
+    st.dataframe(quantiles.round(2))
+
+    currencies = list(sketches['currency'].dropna().unique())
+    currency = st.selectbox("Currency", options=currencies, key=f"sketch_currency_{key_suffix}")
+    in_range = sketches[(sketches['currency'] == currency) & (sketches['day'] >= pd.to_datetime(start_date)) & (sketches['day'] <= pd.to_datetime(end_date))]
+    counts = merge_sketches(in_range)
+    nonzero = np.flatnonzero(counts)
+    fig = go.Figure(data=[go.Bar(x=bucket_values()[nonzero], y=counts[nonzero])])
+    fig.update_layout(title=f"{label} - {currency} Amount Distribution", xaxis={'type': 'log', 'title': 'Amount'})
+    st.plotly_chart(fig, key=f"amount_distribution_chart_{key_suffix}")
@@ -0,0 +1,135 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from config import QUARANTINE_DIR
+from decline_metrics import normalize_decline_reason
+from currency_codes import load_currency_codes
+
+# The 17 columns of a transaction file
+TRANSACTION_COLUMNS = [
+    'itc', 'transaction_type', 'pos_entry_mode', 'CARD_PRESENT/CARD_NOT_PRESENT', 'transaction_status',
+    'ca_name', 'ca_city', 'ca_country', 'date', 'eci', 'txn_amt', 'txn_curr', 'bill_curr', 'bill_amt',
+    'issuerfee', 'networkname', 'mcc',
+]
+REQUIRED_COLUMNS = ['itc', 'transaction_type', 'transaction_status', 'date', 'txn_amt', 'txn_curr']
+NUMERIC_COLUMNS = ['txn_amt', 'txn_curr', 'bill_curr', 'bill_amt', 'issuerfee', 'mcc']
+AMOUNT_COLUMNS = ['txn_amt', 'bill_amt', 'issuerfee']
+CURRENCY_COLUMNS = ['txn_curr', 'bill_curr']
+
+# ISO 4217 numeric codes accepted in txn_curr / bill_curr, from the currency lookup table
+ALLOWED_CURRENCY_CODES = set(load_currency_codes()['numeric'])
+
+# Transaction statuses after folding per-transaction details (see decline_metrics.normalize_decline_reason).
+# Other statuses are new decline reasons: their rows are kept (counted as declined) and only flagged.
+KNOWN_TRANSACTION_STATUSES = {
+    'Approved', 'Account Verification without CVV2 transaction is not allowed', 'Accounting Exception',
+    'Card Expiry Mismatch', 'Card Permanently Closed', 'Card expired', 'Card not active', 'Card not found',
+    'Card suspended', 'Card suspicious', 'Currency not supported in card product', 'Fraud check error',
+    'Fraud check was not successful', 'Fraud engine check has rejected the transaction', 'Incorrect PIN',
+    'Maximum PIN Tries Exceeded', 'Maximum account balance limit reached', 'Min-Max Reload amount to Card - IQD',
+    'Min-Max Reload amount to Card - USD', 'Minimum account balance limit reached', 'Missing fields',
+    'Not Declined', 'Not sufficient funds', 'Original Declined', 'Original not found',
+    'POS transaction is not allowed (Card Level)', 'Required amount not available', 'SYSERR',
+    'Security Violation', 'Transfer Transaction Limit - IQD', 'Transfer Transaction Limit - USD',
+    'Velocity cumulative amount limit exceeded',
+}
+CARD_PRESENCE_VALUES = {'CARD_PRESENT', 'CARD_NOT_PRESENT'}
+
+# Function to flag rows whose value fails a check; the check runs once per distinct value, not per row
+def invalid_values_mask(values, is_valid):
+    distinct = values.dropna().unique()
+    invalid = [value for value in distinct if not is_valid(value)]
+    return values.isin(invalid).to_numpy(dtype=bool)
+
+# Function to validate transactions with column-wise masks.
+# Returns the valid rows (with numeric and date columns converted), the rejected rows with their reasons,
+# and the row counts per rejection reason and per warning (flagged rows that are kept).
+def validate_transactions(df):
+    missing_columns = [column for column in TRANSACTION_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Transaction file is missing columns: {', '.join(missing_columns)}")
+
+    checks = {}
+    for column in REQUIRED_COLUMNS:
+        checks[f"missing {column}"] = df[column].isna().to_numpy(dtype=bool)
+
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    checks["unparseable date"] = (dates.isna() & df['date'].notna()).to_numpy(dtype=bool)
+
+    numeric = {}
+    for column in NUMERIC_COLUMNS:
+        numeric[column] = pd.to_numeric(df[column], errors='coerce')
+        checks[f"non-numeric {column}"] = (numeric[column].isna() & df[column].notna()).to_numpy(dtype=bool)
+    for column in AMOUNT_COLUMNS:
+        checks[f"negative {column}"] = (numeric[column] < 0).to_numpy(dtype=bool)
+    for column in CURRENCY_COLUMNS:
+        checks[f"unknown {column}"] = (numeric[column].notna() & ~numeric[column].isin(ALLOWED_CURRENCY_CODES)).to_numpy(dtype=bool)
+
+    warnings = {}
+    warnings["unknown transaction_status"] = invalid_values_mask(
+        df['transaction_status'], lambda status: normalize_decline_reason(str(status)) in KNOWN_TRANSACTION_STATUSES
+    )
+    checks["invalid CARD_PRESENT/CARD_NOT_PRESENT"] = invalid_values_mask(
+        df['CARD_PRESENT/CARD_NOT_PRESENT'], lambda value: value in CARD_PRESENCE_VALUES
+    )
+    checks["invalid ca_country"] = invalid_values_mask(
+        df['ca_country'], lambda value: isinstance(value, str) and len(value) == 3 and value.isalpha() and value.isupper()
+    )
+
+    invalid = np.logical_or.reduce(list(checks.values()))
+
+    # Reasons are only built for the rejected rows
+    quarantined_df = df[invalid].copy()
+    reasons = pd.Series('', index=quarantined_df.index)
+    for reason, mask in checks.items():
+        reasons = reasons.where(~mask[invalid], reasons + reason + '; ')
+    quarantined_df['rejection_reasons'] = reasons.str.rstrip('; ')
+
+    # The converted columns replace the raw ones; rows are only copied out when some were rejected
+    valid_df = df.assign(date=dates, **numeric)
+    if invalid.any():
+        valid_df = valid_df[~invalid]
+
+    reason_counts = {reason: int(mask.sum()) for reason, mask in checks.items() if mask.any()}
+    warning_counts = {warning: int(mask[~invalid].sum()) for warning, mask in warnings.items() if mask[~invalid].any()}
+    return valid_df, quarantined_df, reason_counts, warning_counts
+
+# Function to write rejected rows to the quarantine directory (removing a stale file when nothing was rejected)
+def write_quarantine(quarantined_df, dataset_name):
+    quarantine_path = os.path.join(QUARANTINE_DIR, f"{dataset_name}_quarantine.csv")
+    if quarantined_df.empty:
+        if os.path.exists(quarantine_path):
+            os.remove(quarantine_path)
+        return None
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    quarantined_df.to_csv(quarantine_path, index=False)
+    return quarantine_path
+
+# Function to validate a loaded transaction file and quarantine the rejected rows
+def validate_and_quarantine(df, dataset_name):
+    valid_df, quarantined_df, reason_counts, warning_counts = validate_transactions(df)
+    report = {
+        "Rows Read": len(df),
+        "Rows Quarantined": len(quarantined_df),
+        "Quarantine File": write_quarantine(quarantined_df, dataset_name),
+        "Reasons": reason_counts,
+        "Warnings": warning_counts,
+    }
+    return valid_df, report
+
+# Function to display the ingest validation counts
+def display_validation_summary(reports):
+    quarantined = sum(report["Rows Quarantined"] for report in reports.values())
+    if quarantined:
+        st.warning(f"{quarantined} malformed transaction rows were quarantined at load time.")
+    with st.expander("Data Validation"):
+        for label, report in reports.items():
+            st.write(f"**{label}:** {report['Rows Read']} rows read, {report['Rows Quarantined']} quarantined")
+            if report["Quarantine File"]:
+                st.write(f"Rejected rows written to `{report['Quarantine File']}`")
+            if report["Reasons"]:
+                st.dataframe(pd.Series(report["Reasons"], name="rows").rename_axis("reason").reset_index())
+            if report["Warnings"]:
+                st.write("Flagged rows kept in the data:")
+                st.dataframe(pd.Series(report["Warnings"], name="rows").rename_axis("warning").reset_index())
@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from data_io import atomic_replace
+
+# Normalized frames are published as uncompressed Arrow IPC files that every server process maps
+# read-only. Columns are laid out so pandas can wrap the mapped buffers instead of copying them:
+# numbers keep NaN as a value (no validity bitmap), dates are stored as their int64 ticks,
+# categoricals as dictionary codes and text as large strings. Only booleans, which Arrow packs
+# into bits, are copied. The pages live in the OS page cache, so N processes share one copy.
+
+INDEX_COLUMN = '__index__'
+
+# Function to convert a column to an Arrow array that can be read back without a copy
+def to_shared_array(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = pa.array(dtype.categories.astype(object), type=pa.large_string())
+        return pa.DictionaryArray.from_arrays(pa.array(series.cat.codes.to_numpy()), categories), {'kind': 'category'}
+    if dtype.kind == 'M':
+        unit = np.datetime_data(dtype)[0]
+        return pa.array(series.to_numpy().view('int64')), {'kind': 'datetime', 'unit': unit}
+    if dtype.kind in 'fiub':
+        return pa.array(series.to_numpy(), from_pandas=False), {'kind': 'numpy'}
+    return pa.array(series.astype(object), type=pa.large_string(), from_pandas=True), {'kind': 'string', 'dtype': str(dtype)}
+
+# Function to write a frame (and JSON metadata) as a shared Arrow file, replacing the target atomically
+def write_shared_frame(df, path, metadata=None):
+    arrays, layouts = [], {}
+    for column in df.columns:
+        array, layouts[column] = to_shared_array(df[column])
+        arrays.append(array)
+    # A filtered frame keeps its original row labels; store them as an extra column
+    has_index = not df.index.equals(pd.RangeIndex(len(df)))
+    if has_index:
+        arrays.append(pa.array(df.index.to_numpy(), from_pandas=False))
+    names = list(df.columns) + ([INDEX_COLUMN] if has_index else [])
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata({
+        'layouts': json.dumps(layouts),
+        'metadata': json.dumps(metadata),
+    })
+    with atomic_replace(path) as temp_path:
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+# Function to rebuild a pandas column on top of a mapped Arrow column
+def from_shared_array(chunk, layout):
+    if layout['kind'] == 'category':
+        return pd.Categorical.from_codes(chunk.indices.to_numpy(zero_copy_only=True), categories=chunk.dictionary.to_pandas())
+    if layout['kind'] == 'datetime':
+        return chunk.to_numpy(zero_copy_only=True).view(f"datetime64[{layout['unit']}]")
+    if layout['kind'] == 'numpy':
+        return chunk.to_numpy(zero_copy_only=chunk.type != pa.bool_())
+    return pd.array(pa.chunked_array([chunk]), dtype=pd.StringDtype('pyarrow', na_value=pd.NA if layout['dtype'] == 'string' else np.nan))
+
+# Function to map a shared Arrow file read-only, returning the frame and its metadata
+def read_shared_frame(path):
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all().combine_chunks()
+    schema_metadata = table.schema.metadata
+    layouts = json.loads(schema_metadata[b'layouts'])
+    chunks = {column: table.column(column).chunk(0) if table.num_rows else pa.array([], table.schema.field(column).type) for column in table.column_names}
+    index = chunks.pop(INDEX_COLUMN).to_numpy(zero_copy_only=True) if INDEX_COLUMN in chunks else None
+    columns = {column: from_shared_array(chunk, layouts[column]) for column, chunk in chunks.items()}
+    return pd.DataFrame(columns, index=index, copy=False), json.loads(schema_metadata[b'metadata'])
@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objs as go
+from config import STATUS_HISTORY_PATHS
+from data_io import atomic_replace
+
+# Card and cardholder status counts are kept as daily change vectors: row i holds how each status
+# count moved between the previous recorded day and day i (the first row is the first snapshot).
+# Any day's counts are a cumulative sum over the rows up to it, and a whole range is one np.cumsum,
+# so years of mostly-zero rows compress to a few kilobytes. Each day's transitions (yesterday's status
+# changes) are kept next to them as plain daily vectors. Every input file is folded in once per day it is
+# dated, keyed by (day, hash), so identical content dropped on another day still records that day.
+
+# Function to create an empty status history
+def create_status_history():
+    return {
+        'statuses': np.array([], dtype=str),
+        'days': np.array([], dtype='datetime64[D]'),
+        'changes': np.zeros((0, 0), dtype=np.int64),
+        'transitions': np.zeros((0, 0), dtype=np.int64),
+        'folded': np.array([], dtype=str),
+    }
+
+# Function to load the status history of 'card' or 'cardholder' (an empty one if nothing was stored yet)
+def load_status_history(kind, path=None):
+    path = path or STATUS_HISTORY_PATHS[kind]
+    if not os.path.exists(path):
+        return create_status_history()
+    with np.load(path) as store:
+        return {key: store[key] for key in store.files}
+
+# Function to save a status history atomically
+def save_status_history(history, kind, path=None):
+    path = path or STATUS_HISTORY_PATHS[kind]
+    with atomic_replace(path, suffix='.tmp.npz') as temp_path:
+        np.savez_compressed(temp_path, **history)
+
+# Function to add columns for statuses the history has not seen before
+def add_statuses(history, statuses):
+    new_statuses = [status for status in dict.fromkeys(statuses) if status not in set(history['statuses'])]
+    if new_statuses:
+        history['statuses'] = np.append(history['statuses'], new_statuses)
+        for key in ['changes', 'transitions']:
+            history[key] = np.pad(history[key], ((0, 0), (0, len(new_statuses))))
+
+# Function to turn {status: count} into a vector over the history's statuses
+def status_vector(history, counts):
+    positions = {status: position for position, status in enumerate(history['statuses'])}
+    vector = np.zeros(len(positions), dtype=np.int64)
+    for status, count in counts.items():
+        vector[positions[status]] += count
+    return vector
+
+# Function to get the row of a day, inserting one (carrying the previous counts forward) if needed
+def day_position(history, day):
+    position = int(np.searchsorted(history['days'], day))
+    if position == len(history['days']) or history['days'][position] != day:
+        history['days'] = np.insert(history['days'], position, day)
+        for key in ['changes', 'transitions']:
+            history[key] = np.insert(history[key], position, 0, axis=0)
+    return position
+
+# Function to record a day's status snapshot; the change vectors are re-derived from the counts
+def record_snapshot(history, day, snapshot):
+    position = day_position(history, day)
+    counts = np.cumsum(history['changes'], axis=0)
+    counts[position] = snapshot
+    history['changes'] = np.diff(counts, axis=0, prepend=np.zeros((1, counts.shape[1]), dtype=np.int64))
+
+# Function to build the key an input file is folded under: the day it describes and its content hash
+def folded_key(day, file_hash):
+    return f"{np.datetime64(pd.Timestamp(day), 'D')}:{file_hash}"
+
+# Function to fold a status snapshot (inception counts) and a day's transitions (yesterday changes)
+# into the history, once per (day, input file)
+def update_status_history(kind, snapshot_counts, snapshot_hash, snapshot_day, transition_counts, transitions_hash, transitions_day, path=None):
+    history = load_status_history(kind, path)
+    folded = set(history['folded'])
+    snapshot_key = folded_key(snapshot_day, snapshot_hash)
+    transitions_key = folded_key(transitions_day, transitions_hash)
+    if snapshot_key in folded and transitions_key in folded:
+        return history
+
+    add_statuses(history, list(snapshot_counts) + list(transition_counts))
+    if snapshot_key not in folded:
+        record_snapshot(history, np.datetime64(pd.Timestamp(snapshot_day), 'D'), status_vector(history, snapshot_counts))
+        history['folded'] = np.append(history['folded'], snapshot_key)
+    if transitions_key not in folded:
+        history['transitions'][day_position(history, np.datetime64(pd.Timestamp(transitions_day), 'D'))] = status_vector(history, transition_counts)
+        history['folded'] = np.append(history['folded'], transitions_key)
+    save_status_history(history, kind, path)
+    return history
+
+# Function to reconstruct the status counts of every recorded day (days x statuses)
+def reconstruct_counts(history):
+    return pd.DataFrame(np.cumsum(history['changes'], axis=0), index=pd.DatetimeIndex(history['days'], name='day'), columns=history['statuses'])
+
+# Function to get the status counts as of a day (the latest recorded day up to it; None before the first)
+def counts_as_of(history, day):
+    position = int(np.searchsorted(history['days'], np.datetime64(pd.Timestamp(day), 'D'), side='right'))
+    if position == 0:
+        return None
+    return dict(zip(history['statuses'].tolist(), history['changes'][:position].sum(axis=0).tolist()))
+
+# Function to display the status counts over time, stacked by status, with the total
+def display_status_growth(history, title, statuses, color_map, key_suffix):
+    if len(history['days']) == 0:
+        st.write("No status history yet.")
+        return
+    counts = reconstruct_counts(history)
+    ordered = [status for status in statuses if status in counts.columns] + [status for status in counts.columns if status not in statuses]
+    fig = go.Figure()
+    for status in ordered:
+        fig.add_trace(go.Scatter(x=counts.index, y=counts[status], mode='lines', stackgroup='counts', name=status, line={'color': color_map.get(status)}))
+    fig.add_trace(go.Scatter(x=counts.index, y=counts.sum(axis=1), mode='lines+markers', name='Total', line={'color': color_map.get('Total'), 'dash': 'dot'}))
+    fig.update_layout(title=f"{title} Growth by Status")
+    st.plotly_chart(fig, key=f"status_growth_chart_{key_suffix}")
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from approval_monitor import create_monitor_state, update_monitor_from_file, get_window_stats
+
+WINDOWS = ['15min', '1h', '1D']
+START = pd.Timestamp('2026-01-01')
+
+# Function to simulate transaction rows from a minute onwards; with late=True some rows are hours behind
+def simulate_rows(rng, count, first_minute, late=False):
+    minutes = first_minute + np.cumsum(rng.integers(0, 6, size=count))
+    if late:
+        minutes = np.where(rng.random(count) < 0.3, minutes - rng.integers(0, 400, size=count), minutes)
+    return pd.DataFrame({
+        'date': [str(START + pd.Timedelta(minutes=int(minute))) for minute in minutes],
+        'networkname': rng.choice(['Visa', 'Mastercard'], size=count),
+        'transaction_type': rng.choice(['POS', 'ATM'], size=count),
+        'transaction_status': rng.choice(['Approved', 'Declined'], size=count),
+    })
+
+# Function to count every window from scratch: the rows later than (latest minute - window)
+def brute_force_counts(df, state):
+    minutes = pd.to_datetime(df['date']).to_numpy().astype('datetime64[m]').astype(np.int64)
+    counts = {}
+    for window_minutes in state['windows']:
+        in_window = df[minutes > minutes.max() - window_minutes]
+        for (network, transaction_type), group in in_window.groupby(['networkname', 'transaction_type']):
+            counts[(window_minutes, network, transaction_type)] = (int((group['transaction_status'] == 'Approved').sum()), len(group))
+    return counts
+
+# Function to get the monitor's window counts in the brute-force layout
+def monitor_counts(state):
+    window_stats = get_window_stats(state)
+    return {
+        (row.window_minutes, row.networkname, row.transaction_type): (int(row.approved), int(row.total))
+        for row in window_stats.itertuples(index=False)
+    }
+
+def test_incremental_windows_match_brute_force(tmp_path):
+    rng = np.random.default_rng(11)
+    path = str(tmp_path / 'transaction_yesterday.csv')
+    df = simulate_rows(rng, 200, 0)
+    df.to_csv(path, index=False)
+    state = create_monitor_state(path, WINDOWS)
+    update_monitor_from_file(state)
+    assert monitor_counts(state) == brute_force_counts(df, state)
+
+    # Appended batches move the watermark forward and carry late rows behind some window cutoffs
+    for batch in range(5):
+        new_rows = simulate_rows(rng, 150, 1000 * (batch + 1), late=True)
+        new_rows.to_csv(path, mode='a', header=False, index=False)
+        df = pd.concat([df, new_rows], ignore_index=True)
+        update_monitor_from_file(state)
+        assert monitor_counts(state) == brute_force_counts(df, state), batch
+
+def test_late_rows_only_count_in_windows_they_fall_inside(tmp_path):
+    path = str(tmp_path / 'transaction_yesterday.csv')
+    rows = pd.DataFrame({'date': [str(START + pd.Timedelta(hours=5))], 'networkname': ['Visa'], 'transaction_type': ['POS'], 'transaction_status': ['Approved']})
+    rows.to_csv(path, index=False)
+    state = create_monitor_state(path, WINDOWS)
+    update_monitor_from_file(state)
+
+    # 30 minutes behind the watermark: outside the 15 minute window, inside the hour and the day
+    late = rows.assign(date=str(START + pd.Timedelta(hours=4, minutes=30)), transaction_status='Declined')
+    late.to_csv(path, mode='a', header=False, index=False)
+    update_monitor_from_file(state)
+    assert monitor_counts(state) == {(15, 'Visa', 'POS'): (1, 1), (60, 'Visa', 'POS'): (1, 2), (1440, 'Visa', 'POS'): (1, 2)}
+    assert pd.Timestamp(state['watermark'], unit='m') == START + pd.Timedelta(hours=5)
+
+def test_replaced_file_starts_over(tmp_path):
+    rng = np.random.default_rng(5)
+    path = str(tmp_path / 'transaction_yesterday.csv')
+    simulate_rows(rng, 300, 0).to_csv(path, index=False)
+    state = create_monitor_state(path, WINDOWS)
+    update_monitor_from_file(state)
+
+    # The next day's drop is larger, so only the fingerprint shows it is not an append
+    replacement = simulate_rows(rng, 2000, 50000)
+    replacement.to_csv(path, index=False)
+    update_monitor_from_file(state)
+    assert monitor_counts(state) == brute_force_counts(replacement, state)
+
+def test_empty_and_header_only_files(tmp_path):
+    path = tmp_path / 'transaction_yesterday.csv'
+    path.write_bytes(b'')
+    state = create_monitor_state(str(path), WINDOWS)
+    update_monitor_from_file(state)
+    assert state['header'] is None and state['offset'] == 0
+
+    path.write_bytes(b'date,networkname,transaction_type,transaction_status\n')
+    update_monitor_from_file(state)
+    assert state['header'] == ['date', 'networkname', 'transaction_type', 'transaction_status']
+    assert state['watermark'] is None and get_window_stats(state).empty
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('polars')
+
+import banking_metrics
+from country_metrics import DOMESTIC, CROSS_BORDER
+from load_test import prepare_workdir
+
+DATASET = 'transaction_inception'
+
+# Function to build a filters argument (see banking_metrics.query_transaction_stats)
+def make_filters(selections=None, start_date=None, end_date=None, country=None):
+    return {'selections': selections or {}, 'start_date': start_date, 'end_date': end_date, 'country': country}
+
+# Function to build filter cases from the values present in the data
+def filter_cases(df):
+    first = {column: df[column].dropna().iloc[0] for column in ['transaction_type', 'currency', 'mcc', 'networkname']}
+    middle_day = df['date'].dropna().sort_values().iloc[len(df) // 2]
+    return {
+        'none': None,
+        'type and currency': make_filters(selections={'transaction_type': [first['transaction_type']], 'currency': [first['currency']]}),
+        'mcc and network': make_filters(selections={'mcc': [first['mcc']], 'networkname': [first['networkname']]}),
+        'date range': make_filters(start_date=str(middle_day.date()), end_date=str(df['date'].max())),
+        'domestic': make_filters(country=DOMESTIC),
+        'cross-border': make_filters(country=CROSS_BORDER),
+    }
+
+# Function to assert two results are equal, comparing floats with a relative tolerance
+def assert_same(pandas_value, polars_value, path='stats'):
+    if isinstance(pandas_value, dict):
+        assert pandas_value.keys() == polars_value.keys(), path
+        for key in pandas_value:
+            assert_same(pandas_value[key], polars_value[key], f"{path}[{key!r}]")
+    elif isinstance(pandas_value, (list, tuple)):
+        assert len(pandas_value) == len(polars_value), path
+        for position, (left, right) in enumerate(zip(pandas_value, polars_value)):
+            assert_same(left, right, f"{path}[{position}]")
+    elif isinstance(pandas_value, pd.DataFrame):
+        pd.testing.assert_frame_equal(pandas_value, polars_value, check_exact=False, obj=path)
+    elif isinstance(pandas_value, (float, np.floating)) and not math.isnan(pandas_value):
+        assert polars_value == pytest.approx(pandas_value, rel=1e-9), path
+    else:
+        assert pandas_value == polars_value or (pd.isna(pandas_value) and pd.isna(polars_value)), path
+
+@pytest.fixture(scope='module')
+def workdir(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('engine_parity')
+    prepare_workdir(str(workdir), 1)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(workdir)
+        yield workdir
+
+# Function to run a query with one engine
+def run_with_engine(monkeypatch, engine, query, *args):
+    monkeypatch.setattr(banking_metrics, 'QUERY_ENGINE', engine)
+    return query(DATASET, *args)
+
+@pytest.mark.parametrize('unique_only', [False, True])
+def test_stats_match_pandas(workdir, monkeypatch, unique_only):
+    df = banking_metrics.load_transaction_dataset(DATASET)[0]
+    for name, filters in filter_cases(df).items():
+        pandas_stats = run_with_engine(monkeypatch, 'pandas', banking_metrics.query_transaction_stats, unique_only, filters)
+        polars_stats = run_with_engine(monkeypatch, 'polars', banking_metrics.query_transaction_stats, unique_only, filters)
+        assert_same(pandas_stats, polars_stats, name)
+
+def test_rows_match_pandas(workdir, monkeypatch):
+    df = banking_metrics.load_transaction_dataset(DATASET)[0]
+    for name, filters in filter_cases(df).items():
+        pandas_rows = run_with_engine(monkeypatch, 'pandas', banking_metrics.query_transaction_rows, filters)
+        polars_rows = run_with_engine(monkeypatch, 'polars', banking_metrics.query_transaction_rows, filters)
+        assert list(pandas_rows.index) == list(polars_rows.index), name
+        for column in pandas_rows.columns:
+            assert pandas_rows[column].astype(object).where(pandas_rows[column].notna(), None).tolist() == \
+                polars_rows[column].astype(object).where(polars_rows[column].notna(), None).tolist(), f"{name}: {column}"
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from fx_normalization import asof_usd_rates, convert_to_reporting_currency
+
+# Function to build a small dated FX table, parsed the way load_fx_rates parses it
+def make_rates():
+    rates = pd.DataFrame({
+        'date': pd.to_datetime(['2024-03-01', '2024-03-01', '2024-03-10']),
+        'currency': pd.Series(['USD', 'IQD', 'IQD'], dtype='string'),
+        'usd_rate': [1.0, 0.0008, 0.0007],
+    })
+    return rates.sort_values('date', kind='stable', ignore_index=True)
+
+def test_empty_input_returns_no_rates():
+    dates = pd.to_datetime(pd.Series([], dtype=str), errors='coerce')
+    usd_rates = asof_usd_rates(dates, pd.Series([], dtype='string'), make_rates())
+    assert usd_rates.shape == (0,)
+
+def test_empty_frame_converts():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(pd.Series([], dtype=str), errors='coerce'),
+        'currency': pd.Series([], dtype='string'),
+        'amount': pd.Series([], dtype=float),
+    })
+    df = convert_to_reporting_currency(df, make_rates(), 'IQD')
+    assert df[['fx_rate', 'reporting_amount']].shape == (0, 2)
+
+def test_date_units_are_aligned():
+    dates = pd.Series(pd.to_datetime(['2024-02-01', '2024-03-05', '2024-03-12', None])).astype('datetime64[s]')
+    currencies = pd.Series(['IQD', 'IQD', 'IQD', 'IQD'], dtype='string')
+    usd_rates = asof_usd_rates(dates, currencies, make_rates())
+    np.testing.assert_array_equal(usd_rates[:3], [0.0008, 0.0008, 0.0007])
+    assert np.isnan(usd_rates[3])
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from onboarding_funnel import (
+    TRANSITION_BINS_HOURS, TRANSITION_BIN_LABELS, create_funnel_store, update_funnel_store, fold_events, calculate_daily_mix,
+)
+
+STAGES = ['Created', 'Pending KYC', 'Pending IDV', 'Activated']
+
+# Function to fold events one at a time in time order: the reference the vectorized fold must match
+def fold_events_one_by_one(reference, events):
+    events = events.assign(timestamp=pd.to_datetime(events['timestamp']))
+    events = events[events['newstate'].isin(STAGES)].sort_values('timestamp', kind='stable')
+    for cardholder_id, state, timestamp in events[['cardholder_id', 'newstate', 'timestamp']].itertuples(index=False):
+        stage = STAGES.index(state)
+        cardholder = reference['cardholders'].get(cardholder_id)
+        if cardholder is None:
+            cardholder = {'cohort': timestamp.normalize(), 'created': timestamp if stage == 0 else None, 'reached': 0}
+            reference['cardholders'][cardholder_id] = cardholder
+        if stage < cardholder['reached']:
+            continue
+        cohort = reference['cohorts'].setdefault(cardholder['cohort'], dict.fromkeys(STAGES, 0))
+        for passed in STAGES[cardholder['reached']:stage + 1]:
+            cohort[passed] += 1
+        cardholder['reached'] = stage + 1
+        if stage > 0 and cardholder['created'] is not None:
+            hours = (timestamp - cardholder['created']).total_seconds() / 3600
+            reference['transition_counts'][state][np.searchsorted(TRANSITION_BINS_HOURS, hours, side='right') - 1] += 1
+
+# Function to simulate a day's event export: cardholders moving forward, skipping or repeating stages
+def simulate_events(rng, day, cardholder_ids):
+    rows = []
+    for cardholder_id in cardholder_ids:
+        timestamp = pd.Timestamp(day) + pd.Timedelta(minutes=int(rng.integers(0, 1440)))
+        for _ in range(int(rng.integers(1, 4))):
+            rows.append({'operation': 'CARDHOLDER_STATUS_CHANGE', 'newstate': STAGES[int(rng.integers(0, len(STAGES)))],
+                         'cardholder_id': cardholder_id, 'timestamp': str(timestamp.floor('s'))})
+            timestamp += pd.Timedelta(hours=float(rng.exponential(30)))
+    return pd.DataFrame(rows)
+
+def test_vectorized_events_match_one_by_one(tmp_path):
+    rng = np.random.default_rng(7)
+    store = create_funnel_store(STAGES)
+    reference = {'cohorts': {}, 'cardholders': {}, 'transition_counts': {stage: np.zeros(len(TRANSITION_BIN_LABELS), dtype=np.int64) for stage in STAGES[1:]}}
+    for day_number, day in enumerate(pd.date_range('2026-01-01', periods=6, freq='D')):
+        # Half of each day's cardholders were seen on earlier days
+        cardholder_ids = rng.choice(np.arange(day_number * 40 + 80), size=60, replace=False)
+        events = simulate_events(rng, day, cardholder_ids)
+        fold_events(store, events)
+        fold_events_one_by_one(reference, events)
+
+    assert store['cohorts'] == reference['cohorts']
+    for stage in STAGES[1:]:
+        assert store['transition_counts'][stage].tolist() == reference['transition_counts'][stage].tolist(), stage
+    reached = {cardholder_id: cardholder['reached'] for cardholder_id, cardholder in reference['cardholders'].items()}
+    assert store['cardholders']['reached'].to_dict() == reached
+
+def test_count_exports_are_a_daily_mix_folded_once_per_day(tmp_path):
+    path = str(tmp_path / 'onboarding_funnel.pkl')
+    counts = pd.DataFrame({'operation': ['CARDHOLDER_STATUS_CHANGE'] * 3, 'newstate': ['Pending IDV', 'Activated', 'Terminated'], 'count': [30, 10, 5]})
+    for day in ['2026-03-01', '2026-03-02', '2026-03-02']:
+        store = update_funnel_store(counts, 'same-content', pd.Timestamp(day), STAGES, path)
+
+    assert store['cohorts'] == {}
+    assert sorted(store['daily_counts']) == [pd.Timestamp('2026-03-01'), pd.Timestamp('2026-03-02')]
+    mix = calculate_daily_mix(store)
+    assert mix['Pending IDV'].tolist() == [30, 30]
+    assert mix['Activated %'].tolist() == [25.0, 25.0]
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+from status_history import update_status_history, load_status_history, reconstruct_counts, counts_as_of
+
+STATUSES = ['Activated', 'Inactive', 'Suspended', 'Terminated']
+
+# Function to simulate daily status counts: mostly unchanged days with occasional moves
+def simulate_counts(days, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = np.array([500, 200, 20, 10])
+    rows = []
+    for _ in range(days):
+        if rng.random() < 0.3:
+            counts = np.maximum(counts + rng.integers(-5, 6, size=len(STATUSES)), 0)
+        rows.append(counts.copy())
+    return rows
+
+# Function to fold one simulated day into the history, hashing the counts like a file's content
+def fold_day(path, day, counts, transitions):
+    snapshot = dict(zip(STATUSES, counts.tolist()))
+    return update_status_history(
+        'card',
+        snapshot, repr(sorted(snapshot.items())), day,
+        transitions, repr(sorted(transitions.items())), day,
+        path=path,
+    )
+
+def test_three_year_history_reconstructs_every_day(tmp_path):
+    path = str(tmp_path / 'card_status_history.npz')
+    days = pd.date_range('2023-01-01', periods=3 * 365, freq='D')
+    expected = simulate_counts(len(days))
+    for day, counts in zip(days, expected):
+        fold_day(path, day, counts, {'Activated': int(counts[0] % 7)})
+
+    history = load_status_history('card', path)
+    counts = reconstruct_counts(history)
+    assert list(counts.index) == list(days)
+    assert np.array_equal(counts[STATUSES].to_numpy(), np.array(expected))
+    assert history['transitions'][:, 0].tolist() == [int(row[0] % 7) for row in expected]
+    assert counts_as_of(history, days[400] + pd.Timedelta(hours=12)) == dict(zip(STATUSES, expected[400].tolist()))
+    assert counts_as_of(history, days[0] - pd.Timedelta(days=1)) is None
+    assert os.path.getsize(path) < 64 * 1024
+
+def test_identical_files_on_different_days_record_both_days(tmp_path):
+    path = str(tmp_path / 'card_status_history.npz')
+    counts = np.array([5, 4, 3, 2])
+    transitions = {'Activated': 1}
+    fold_day(path, '2024-03-01', counts, transitions)
+    fold_day(path, '2024-03-02', counts, transitions)
+    fold_day(path, '2024-03-02', counts, transitions)
+
+    history = load_status_history('card', path)
+    assert history['days'].astype(str).tolist() == ['2024-03-01', '2024-03-02']
+    assert history['transitions'][:, 0].tolist() == [1, 1]
+    assert len(history['folded']) == 4
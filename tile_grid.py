@@ -0,0 +1,60 @@
+import re
+import html
+import streamlit as st
+
+# Tiles are rendered as HTML rows instead of st.columns + st.markdown + st.metric per tile: a row of
+# N tiles is one markdown element instead of 3N + 1 deltas, and a grid's rows sit in one container
+# with a stable key, so reruns send the same element tree and the browser only patches changed rows.
+
+TILE_GRID_CSS = """
+<style>
+.tile-row { display: grid; gap: 1rem; margin-bottom: 1rem; }
+.tile-label { font-size: 0.9rem; font-weight: 600; margin-bottom: 0.25rem; }
+.tile-value { font-size: 2rem; line-height: 1.2; }
+.tile-delta { font-size: 0.9rem; }
+.tile-delta.up { color: #09ab3b; }
+.tile-delta.down { color: #ff2b2b; }
+.tile-delta.off { color: grey; }
+.tile-box { height: 120px; padding: 20px; border-radius: 8px; text-align: center; color: #fff; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2); }
+.tile-box .tile-value { font-size: 1.75rem; font-weight: 600; }
+</style>
+"""
+
+# Function to add the tile grid styles to the page (once per display function)
+def tile_grid_styles():
+    st.markdown(TILE_GRID_CSS, unsafe_allow_html=True)
+
+# Function to describe one tile: a colored label over a value, with an optional st.metric-style delta
+# ('normal': up is good, 'inverse': up is bad, 'off': grey). With a background it is drawn as a box.
+def tile(label, value, color='grey', delta=None, delta_color='normal', background=None):
+    return {'label': label, 'value': value, 'color': color, 'delta': delta, 'delta_color': delta_color, 'background': background}
+
+# Function to format a delta the way st.metric does, with its arrow and color class
+def delta_html(delta, delta_color):
+    if delta is None:
+        return ""
+    arrow = "&#9650;" if delta > 0 else "&#9660;" if delta < 0 else ""
+    good = delta > 0 if delta_color == 'normal' else delta < 0
+    direction = 'off' if delta_color == 'off' or delta == 0 else 'up' if good else 'down'
+    text = f"{abs(delta):,.2f}".rstrip('0').rstrip('.') if isinstance(delta, float) else f"{abs(delta):,}"
+    return f"<div class='tile-delta {direction}'>{arrow} {text}</div>"
+
+# Function to build the HTML of one tile
+def tile_html(tile_spec):
+    label, value = html.escape(str(tile_spec['label'])), html.escape(str(tile_spec['value']))
+    if tile_spec['background']:
+        return f"<div class='tile-box' style='background-color: {tile_spec['background']};'><div class='tile-label'>{label}</div><div class='tile-value'>{value}</div></div>"
+    return (
+        f"<div class='tile'><div class='tile-label' style='color: {tile_spec['color']};'>{label}</div>"
+        f"<div class='tile-value'>{value}</div>{delta_html(tile_spec['delta'], tile_spec['delta_color'])}</div>"
+    )
+
+# Function to build the HTML of one row of tiles (one markdown payload)
+def tile_row_html(tiles, columns=None):
+    return f"<div class='tile-row' style='grid-template-columns: repeat({columns or len(tiles)}, 1fr);'>{''.join(tile_html(tile_spec) for tile_spec in tiles)}</div>"
+
+# Function to render rows of tiles in one keyed container, one markdown element per row
+def render_tile_grid(rows, key, columns=None):
+    with st.container(key=f"tile_grid_{re.sub(r'[^0-9a-zA-Z]+', '_', key).strip('_').lower()}"):
+        for tiles in rows:
+            st.markdown(tile_row_html(tiles, columns), unsafe_allow_html=True)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+# Function to build a categorical index over a column so that the rows for any value
+# are found with a code lookup instead of a string comparison over every row.
+# Rows are sorted once by category code; offsets[code + 1] marks where each code starts
+# (slot 0 holds missing values).
+def build_category_index(df, column):
+    values = df[column]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    codes = values.cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes + 1, minlength=len(values.cat.categories) + 1)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return {
+        'column': column,
+        'categories': values.cat.categories,
+        'codes': codes,
+        'order': order,
+        'offsets': offsets,
+    }
+
+# Function to get the category code for a value (-1 for missing or unknown values)
+def category_code(index, value):
+    if value is None or pd.isna(value):
+        return -1
+    categories = index['categories']
+    if value not in categories:
+        return -1
+    return categories.get_loc(value)
+
+# Function to get the row positions holding any of the given category codes
+def lookup_codes(index, codes):
+    offsets, order = index['offsets'], index['order']
+    parts = [order[offsets[code + 1]:offsets[code + 2]] for code in codes]
+    if not parts:
+        return np.empty(0, dtype=order.dtype)
+    return np.sort(np.concatenate(parts))
@@ -1,35 +1,50 @@
-import pandas as pd
 import streamlit as st
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
-
-# Function to load data from CSV files
-def load_data():
-    yesterday_df = pd.read_csv('transaction_yesterday.csv')
-    inception_df = pd.read_csv('transaction_inception.csv')
-    return yesterday_df, inception_df
+from data_io import read_csv, TRANSACTION_COLUMN_TYPES
+from config import CSV_ENGINE, CURRENCY_CODES_PATH
+from dataset_manifest import get_dataset_path, cached_artifact, file_hash, pipeline_key
+from currency_codes import load_currency_codes, currency_labels
+from paginated_table import display_paginated_table
+
+# Function to load the summary of a transaction dataset (stats, grouped table, type counts).
+# It is built from the CSV once per file content and reused as an artifact afterwards.
+def load_transaction_summary(dataset_name):
+    def build():
+        df = read_csv(get_dataset_path(dataset_name), TRANSACTION_COLUMN_TYPES)
+        return {
+            'stats': calculate_transaction_stats(df),
+            'grouped': group_transaction_data(df),
+            'type_counts': df['transaction_type'].value_counts(),
+        }
+    summary_key = pipeline_key(CSV_ENGINE, file_hash(CURRENCY_CODES_PATH))
+    return cached_artifact(dataset_name, f"transaction-summary-{summary_key}", build)
 
 # Function to calculate transaction statistics for each currency and transaction type
 def calculate_transaction_stats(df):
     # Amount and currency logic
-    df['amount'] = df.apply(lambda row: row['bill_amt'] if pd.notnull(row['bill_amt']) else row['txn_amt'], axis=1)
-    df['currency'] = df.apply(lambda row: row['bill_curr'] if pd.notnull(row['bill_curr']) else row['txn_curr'], axis=1)
-
-    # Replace currency codes
-    df['currency'] = df['currency'].replace({368: 'IQD', 840: 'USD'})
-
-    # Group by currency and transaction type
-    grouped = df.groupby(['currency', 'transaction_type']).agg(
-        total_count=('transaction_status', 'size'),
-        accepted_count=('transaction_status', lambda x: (x == 'Approved').sum()),
-        rejected_count=('transaction_status', lambda x: (x != 'Approved').sum()),
-        accepted_amount=('amount', lambda x: x[df['transaction_status'] == 'Approved'].sum()),
-        rejected_amount=('amount', lambda x: x[df['transaction_status'] != 'Approved'].sum())
+    df['amount'] = df['bill_amt'].fillna(df['txn_amt'])
+    df['currency'] = currency_labels(df['bill_curr'].fillna(df['txn_curr']), load_currency_codes())
+
+    # Group by currency and transaction type in one pass
+    accepted = df['transaction_status'] == 'Approved'
+    grouped = df.assign(
+        accepted=accepted,
+        rejected=~accepted,
+        accepted_amount=df['amount'].where(accepted, 0),
+        rejected_amount=df['amount'].where(~accepted, 0),
+    ).groupby(['currency', 'transaction_type']).agg(
+        total_count=('accepted', 'size'),
+        accepted_count=('accepted', 'sum'),
+        rejected_count=('rejected', 'sum'),
+        accepted_amount=('accepted_amount', 'sum'),
+        rejected_amount=('rejected_amount', 'sum')
     ).reset_index()
 
-    # Create a stats dictionary for each currency
+    # Create a stats dictionary for each currency in the data, busiest first
     stats = {}
-    for currency in ['IQD', 'USD']:
+    currency_order = grouped.groupby('currency')['total_count'].sum().sort_values(ascending=False, kind='stable').index
+    for currency in currency_order:
         currency_stats = grouped[grouped['currency'] == currency]
         stats[currency] = {}
         for _, row in currency_stats.iterrows():
@@ -103,59 +118,53 @@ def group_transaction_data(df):
     ).size().reset_index(name='counts')
     return grouped_data
 
+# Function to display the per-currency summary tables, two per row
+def display_currency_tables(stats, label):
+    currencies = list(stats)
+    for start in range(0, len(currencies), 2):
+        for col, currency in zip(st.columns([1, 1]), currencies[start:start + 2]):
+            with col:
+                st.write(f"#### {currency} Transactions ({label})")
+                st.markdown(create_html_table(stats[currency], currency), unsafe_allow_html=True)
+
 # Function to display pie charts for transaction status
 def display_pie_chart(stats, title, key_suffix):
     labels = ['Approved', 'Declined']
-    values_iqd = [
-        sum([data['Accepted Transactions'] for data in stats['IQD'].values()]),
-        sum([data['Rejected Transactions'] for data in stats['IQD'].values()])
-    ]
-    values_usd = [
-        sum([data['Accepted Transactions'] for data in stats['USD'].values()]),
-        sum([data['Rejected Transactions'] for data in stats['USD'].values()])
-    ]
+    currencies = list(stats) or ['No data']
 
-    # Create pie subplots
-    fig = make_subplots(rows=1, cols=2, specs=[[{'type': 'pie'}, {'type': 'pie'}]], subplot_titles=(f"{title} - IQD Transactions", f"{title} - USD Transactions"))
+    # Create one pie subplot per currency
+    fig = make_subplots(rows=1, cols=len(currencies), specs=[[{'type': 'pie'}] * len(currencies)], subplot_titles=[f"{title} - {currency} Transactions" for currency in currencies])
 
-    fig.add_trace(go.Pie(labels=labels, values=values_iqd, name='IQD'), row=1, col=1)
-    fig.add_trace(go.Pie(labels=labels, values=values_usd, name='USD'), row=1, col=2)
+    for col, currency in enumerate(stats, start=1):
+        values = [
+            sum([data['Accepted Transactions'] for data in stats[currency].values()]),
+            sum([data['Rejected Transactions'] for data in stats[currency].values()])
+        ]
+        fig.add_trace(go.Pie(labels=labels, values=values, name=currency), row=1, col=col)
 
     st.plotly_chart(fig, key=f"pie_chart_{key_suffix}")
 
 # Function to display transaction type pie chart
-def display_transaction_type_pie_chart(df, title, key_suffix):
-    # Group by transaction type
-    transaction_type_counts = df['transaction_type'].value_counts()
-
+def display_transaction_type_pie_chart(transaction_type_counts, title, key_suffix):
     fig = go.Figure(data=[go.Pie(labels=transaction_type_counts.index, values=transaction_type_counts.values)])
     fig.update_layout(title=f"{title} - Transaction Type Distribution")
     st.plotly_chart(fig, key=f"type_pie_chart_{key_suffix}")
 
 # Main function to display transaction metrics
 def display_transaction_metrics():
-    # Load the data
-    yesterday_df, inception_df = load_data()
-
-    # Calculate statistics for Yesterday and Inception
-    yesterday_stats = calculate_transaction_stats(yesterday_df)
-    inception_stats = calculate_transaction_stats(inception_df)
+    # Load the summaries, kept server-side and reused until the dataset changes
+    yesterday_summary = load_transaction_summary('transaction_yesterday')
+    inception_summary = load_transaction_summary('transaction_inception')
 
-    # Create grouped data
-    inception_grouped_data = group_transaction_data(inception_df)
-    yesterday_grouped_data = group_transaction_data(yesterday_df)
+    # Statistics and grouped data for Yesterday and Inception
+    yesterday_stats = yesterday_summary['stats']
+    inception_stats = inception_summary['stats']
+    inception_grouped_data = inception_summary['grouped']
+    yesterday_grouped_data = yesterday_summary['grouped']
 
     # Display transaction summaries for Inception
     st.write("### Transaction Summary (Inception)")
-    col1, col2 = st.columns([1, 1])
-
-    with col1:
-        st.write("#### IQD Transactions (Inception)")
-        st.markdown(create_html_table(inception_stats['IQD'], 'IQD'), unsafe_allow_html=True)
-
-    with col2:
-        st.write("#### USD Transactions (Inception)")
-        st.markdown(create_html_table(inception_stats['USD'], 'USD'), unsafe_allow_html=True)
+    display_currency_tables(inception_stats, "Inception")
 
     # Move the chart to a new row
     st.write("#### Inception Transaction Status Distribution")
@@ -163,15 +172,7 @@ def display_transaction_metrics():
 
     # Display transaction summaries for Yesterday
     st.write("### Transaction Summary (Yesterday)")
-    col3, col4 = st.columns([1, 1])
-
-    with col3:
-        st.write("#### IQD Transactions (Yesterday)")
-        st.markdown(create_html_table(yesterday_stats['IQD'], 'IQD'), unsafe_allow_html=True)
-
-    with col4:
-        st.write("#### USD Transactions (Yesterday)")
-        st.markdown(create_html_table(yesterday_stats['USD'], 'USD'), unsafe_allow_html=True)
+    display_currency_tables(yesterday_stats, "Yesterday")
 
     # Move the chart to a new row
     st.write("#### Yesterday Transaction Status Distribution")
@@ -184,11 +185,11 @@ def display_transaction_metrics():
 
     with col7:
         st.write("#### Inception Transaction Type Summary")
-        st.dataframe(inception_grouped_data)  # Use st.table to display Inception data
+        display_paginated_table(inception_grouped_data, key_suffix="inception_grouped", default_sort='counts')
 
     with col8:
         st.write("#### Yesterday Transaction Type Summary")
-        st.dataframe(yesterday_grouped_data)  # Use st.table to display Yesterday data
+        display_paginated_table(yesterday_grouped_data, key_suffix="yesterday_grouped", default_sort='counts')
 
     # Display transaction type distribution charts
     st.write("### Transaction Type Distribution")
@@ -196,11 +197,11 @@ def display_transaction_metrics():
 
     with col9:
         st.write("#### Inception")
-        display_transaction_type_pie_chart(inception_df, "Inception", key_suffix="inception_type")
+        display_transaction_type_pie_chart(inception_summary['type_counts'], "Inception", key_suffix="inception_type")
 
     with col10:
         st.write("#### Yesterday")
-        display_transaction_type_pie_chart(yesterday_df, "Yesterday", key_suffix="yesterday_type")
+        display_transaction_type_pie_chart(yesterday_summary['type_counts'], "Yesterday", key_suffix="yesterday_type")
 
 # Run the transaction metrics
 if __name__ == "__main__":